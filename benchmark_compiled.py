@@ -0,0 +1,76 @@
+"""
+Rows/sec of the saved scope models: estimator .predict() on a DataFrame vs
+the compiled model as load_compiled() returns it (what --compiled runs): the
+flat-array evaluator on a float32 matrix, or, for CatBoost batches of
+NATIVE_MIN_ROWS or more, the native model it delegates to (path "native").
+
+Batches of 1, 100 and 100k rows are tiled from the processed test set:
+
+    python benchmark_compiled.py --repeats 5
+"""
+
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from compiled_trees import as_float32, load_compiled
+from storage import read_table
+
+
+def rows_per_sec(fn, n_rows, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return n_rows / np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 100_000])
+    args = parser.parse_args()
+
+    feature_cols = joblib.load("models/feature_cols.joblib")
+    X_test = read_table("test_after_feature_engineering")[feature_cols]
+
+    rows = []
+    for name in ["best_scope1", "best_scope2", "best_joint"]:
+        try:
+            model = joblib.load(f"models/{name}.joblib")
+        except FileNotFoundError:
+            continue
+        compiled = load_compiled(f"models/{name}.npz")
+        diff = np.abs(np.asarray(model.predict(X_test)) - compiled.predict(X_test)).max()
+
+        for n in args.rows:
+            X = X_test.iloc[np.arange(n) % len(X_test)].reset_index(drop=True)
+            native = getattr(compiled, "delegates", lambda n: False)(n)
+            X_in = X if native else as_float32(X)
+            estimator = rows_per_sec(lambda: model.predict(X), n, args.repeats)
+            fast = rows_per_sec(lambda: compiled.predict(X_in), n, args.repeats)
+            rows.append({
+                "model": f"{name} ({type(model).__name__})",
+                "rows": n,
+                "path": "native" if native else "numpy",
+                "estimator_rows_s": estimator,
+                "compiled_rows_s": fast,
+                "speedup": fast / estimator,
+                "max_abs_diff": diff,
+            })
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, formatters={
+        "estimator_rows_s": "{:,.0f}".format,
+        "compiled_rows_s": "{:,.0f}".format,
+        "speedup": "{:.1f}x".format,
+        "max_abs_diff": "{:.1e}".format,
+    }))
+
+
+if __name__ == "__main__":
+    main()
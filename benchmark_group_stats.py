@@ -0,0 +1,82 @@
+"""
+Group-statistics lookup tables (group_stats.GroupTable) vs pandas.
+
+Applying: the fitted sector/country tables are applied to --rows keys
+sampled from the training frame, once by reindexing the statistics frame
+(the previous scoring path) and once by code lookup + row gather. Updating:
+the tables are fitted on all but --new-entities training entities and then
+updated with the rest, vs a refit on everything; the results must agree.
+
+    python benchmark_group_stats.py --rows 1000000 --new-entities 50
+"""
+
+import argparse
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import TRAIN_CHECKPOINT, FeaturePipeline
+from storage import read_table
+
+
+def timed(fn, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--new-entities", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    train = read_table(TRAIN_CHECKPOINT)
+    pipeline = FeaturePipeline().fit(train)
+    rng = np.random.default_rng(args.seed)
+    rows = train.iloc[rng.integers(0, len(train), args.rows)].reset_index(drop=True)
+
+    report = []
+    for table in (pipeline.sector_stats, pipeline.country_stats):
+        keys = rows[table.key]
+        frame = table.to_frame()
+        reindexed, reindex_s = timed(lambda: frame.reindex(keys).values)
+        gathered, gather_s = timed(lambda: table.lookup(keys))
+        codes = table.codes(keys)
+        _, coded_s = timed(lambda: np.take(table.table, codes, axis=0))
+        report.append({
+            "table": table.key, "groups": len(table.keys), "reindex_s": reindex_s, "lookup_s": gather_s,
+            "gather_only_s": coded_s, "speedup": reindex_s / gather_s,
+            "identical": np.array_equal(reindexed, gathered, equal_nan=True),
+        })
+    print(f"Applying to {args.rows} rows")
+    print(pd.DataFrame(report).to_string(index=False, float_format=lambda x: f"{x:.4g}"))
+
+    ids = train["entity_id"].unique()
+    new_ids = rng.choice(ids, size=args.new_entities, replace=False)
+    old, new = train[~train["entity_id"].isin(new_ids)], train[train["entity_id"].isin(new_ids)]
+    base = FeaturePipeline().fit(old)
+    refit, refit_s = timed(lambda: copy.deepcopy(base).fit_group_stats(train))
+    _, update_s = timed(lambda: base.update_group_stats(new), repeat=1)
+
+    report = []
+    for name in ("country_proxy", "sector_stats", "country_stats"):
+        updated = getattr(base, name).to_frame().sort_index()
+        fitted = getattr(refit, name).to_frame().sort_index()
+        report.append({
+            "table": name, "version": getattr(base, name).version,
+            "max_abs_diff": np.nanmax(np.abs(updated.values - fitted.values)),
+            "same_keys": updated.index.equals(fitted.index),
+        })
+    print(f"\nUpdate with {len(new_ids)} new entities: {update_s:.4f}s (refit on all {refit_s:.4f}s)")
+    print(pd.DataFrame(report).to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Incremental re-scoring (incremental_scoring.rescore) vs change volume.
+
+A synthetic universe of --entities (benchmark_streaming.synthetic_universe)
+is scored once in full, then for each --changed fraction that share of
+entities gets its revenue split rescaled and the universe is re-scored
+incrementally. Each incremental result is checked against a full re-score
+of the changed universe.
+
+    python benchmark_incremental.py --entities 100000 --changed 0 0.001 0.01 0.1 1
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmark_streaming import synthetic_universe
+from incremental_scoring import rescore
+from scoring import Scorer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=100_000)
+    parser.add_argument("--changed", type=float, nargs="+", default=[0, 0.001, 0.01, 0.1, 1])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    entities, children = synthetic_universe(args.entities)
+    revenue = children["revenue"]
+    ids = entities["entity_id"].unique()
+    rng = np.random.default_rng(args.seed)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        in_path = os.path.join(tmp, "entities.csv")
+        out_path = os.path.join(tmp, "predictions.csv")
+        cache_dir = os.path.join(tmp, "cache")
+        entities.to_csv(in_path, index=False)
+
+        def run(revenue):
+            scorer = Scorer(env=children["env"], sdg=children["sdg"], revenue=revenue)
+            return rescore(scorer, in_path, out_path, cache_dir=cache_dir)
+
+        summary = run(revenue)
+        rows.append({"changed": "full", "rescored": summary["rescored"], "seconds": summary["seconds"],
+                     "matches_full": True})
+        full_seconds = summary["seconds"]
+
+        for fraction in args.changed:
+            # Every run starts from the unchanged universe's predictions
+            run(revenue)
+            picked = rng.choice(ids, size=int(round(fraction * len(ids))), replace=False)
+            changed = revenue.copy()
+            mask = changed["entity_id"].isin(picked)
+            changed.loc[mask, "revenue_pct"] *= 0.5
+            summary = run(changed)
+            incremental = pd.read_csv(out_path, float_precision="round_trip")
+
+            full = Scorer(env=children["env"], sdg=children["sdg"], revenue=changed).predict(entities)
+            full = full.sort_values("entity_id", kind="stable").reset_index(drop=True)
+            rows.append({"changed": f"{fraction:.1%}", "rescored": summary["rescored"],
+                         "seconds": summary["seconds"], "matches_full": np.allclose(
+                             incremental.drop(columns="entity_id"), full.drop(columns="entity_id"),
+                             rtol=1e-12, atol=0)})
+            print(f"{fraction:.1%} changed done", flush=True)
+
+    report = pd.DataFrame(rows)
+    report["vs_full"] = report["seconds"] / full_seconds
+    print(f"Entities: {len(ids)}")
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Two single-target scope models vs one joint CatBoost MultiRMSE model.
+
+Uses the training split from training_model.py and the hyperparameters of
+the saved models (the joint model takes the scope 1 CatBoost's). Reports fit
+time, predict latency for the full test split and a single row, and
+validation/test RMSE per target:
+
+    python benchmark_joint.py --repeats 20
+"""
+
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from storage import read_table
+
+TARGETS = ["target_scope_1_log", "target_scope_2_log"]
+
+
+def timed(fn, repeats=1):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    df = read_table("data_after_feature_engineering")
+    train_val, test = train_test_split(df, test_size=0.15, random_state=42, shuffle=True)
+    train, val = train_test_split(train_val, test_size=0.1765, random_state=42, shuffle=True)
+
+    feature_cols = joblib.load("models/feature_cols.joblib")
+    scope1 = clone(joblib.load("models/best_scope1.joblib"))
+    scope2 = clone(joblib.load("models/best_scope2.joblib"))
+    # Same-family baseline: a second CatBoost with the scope 1 hyperparameters
+    scope2_cat = clone(scope1)
+    joint = CatBoostRegressor(**dict(scope1.get_params(), loss_function="MultiRMSE"))
+
+    X_train = train[feature_cols]
+    _, fit_s1 = timed(lambda: scope1.fit(X_train, train[TARGETS[0]]))
+    _, fit_s2 = timed(lambda: scope2.fit(X_train, train[TARGETS[1]]))
+    _, fit_s2_cat = timed(lambda: scope2_cat.fit(X_train, train[TARGETS[1]]))
+    _, fit_joint = timed(lambda: joint.fit(X_train, train[TARGETS]))
+
+    def pair(model1, model2):
+        return lambda X: np.column_stack([model1.predict(X), model2.predict(X)])
+
+    rows = []
+    for name, fit_s, predict in [
+        ("saved pair", fit_s1 + fit_s2, pair(scope1, scope2)),
+        ("two CatBoost", fit_s1 + fit_s2_cat, pair(scope1, scope2_cat)),
+        ("joint MultiRMSE", fit_joint, joint.predict),
+    ]:
+        X_test = test[feature_cols]
+        X_one = X_test.iloc[:1]
+        _, batch_s = timed(lambda: predict(X_test), args.repeats)
+        _, one_s = timed(lambda: predict(X_one), args.repeats)
+        row = {
+            "setup": name,
+            "fit_s": fit_s,
+            "predict_batch_ms": batch_s * 1e3,
+            "predict_1row_ms": one_s * 1e3,
+        }
+        for split_name, split in [("val", val), ("test", test)]:
+            pred = predict(split[feature_cols])
+            for i, t in enumerate(TARGETS):
+                rmse = np.sqrt(mean_squared_error(split[t], pred[:, i]))
+                row[f"{split_name}_rmse_scope{i + 1}"] = rmse
+        rows.append(row)
+
+    report = pd.DataFrame(rows).set_index("setup").T
+    print(f"Train rows: {len(train)}, test batch: {len(test)} rows, repeats: {args.repeats}")
+    print(report.to_string(float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
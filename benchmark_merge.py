@@ -0,0 +1,84 @@
+"""
+Benchmark the exploding outer merge against the entity-level join engine.
+
+Inputs are the outlier-fixed source tables, optionally replicated N times with
+shifted entity ids to emulate a larger portfolio:
+
+    python benchmark_merge.py --scale 1 10 100
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from entity_join import build_entity_frame
+from merge_datasets import outer_merge
+from storage import read_table
+
+
+def load_tables():
+    return (
+        read_table("train_outliers_fixed"),
+        read_table("environmental_activities_outliers_fixed"),
+        pd.read_csv("data/revenue_distribution_by_sector.csv"),
+        pd.read_csv("data/sustainable_development_goals.csv"),
+    )
+
+
+def replicate(tables, scale):
+    if scale == 1:
+        return tables
+    offset = int(max(t["entity_id"].max() for t in tables)) + 1
+    out = []
+    for t in tables:
+        reps = [t.assign(entity_id=t["entity_id"] + i * offset) for i in range(scale)]
+        out.append(pd.concat(reps, ignore_index=True))
+    return tuple(out)
+
+
+def measure(fn, tables):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*tables)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": len(result),
+        "entities": result["entity_id"].nunique(),
+        "seconds": elapsed,
+        "peak_mb": peak / 1e6,
+        "frame_mb": result.memory_usage(deep=True).sum() / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    base_tables = load_tables()
+    input_rows = sum(len(t) for t in base_tables)
+
+    rows = []
+    for scale in args.scale:
+        tables = replicate(base_tables, scale)
+        for name, fn in [("outer_merge", outer_merge), ("entity_join", build_entity_frame)]:
+            res = measure(fn, tables)
+            res.update({"scale": scale, "method": name, "input_rows": input_rows * scale})
+            rows.append(res)
+
+    report = pd.DataFrame(rows)[
+        ["scale", "method", "input_rows", "rows", "entities", "seconds", "peak_mb", "frame_mb"]
+    ]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+    ratio = report.pivot(index="scale", columns="method", values="peak_mb")
+    print("\nPeak memory ratio (outer_merge / entity_join):")
+    print((ratio["outer_merge"] / ratio["entity_join"]).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
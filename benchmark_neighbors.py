@@ -0,0 +1,119 @@
+"""
+KNN SDG imputation cost: the original KNeighborsClassifier loop (5 k values
+x 5 folds of cross_val_score, then a final fit) vs one neighbour index per
+fold queried once at the largest k, for each backend in neighbors.py.
+
+Known/unknown rows of merged_dataset are replicated N times with small
+Gaussian jitter to emulate larger portfolios. Recall@k is measured against
+exact brute force by distance: a returned neighbour counts if it is no
+farther than the true k-th neighbour (the exploded frame has many exact
+ties, so neighbour ids are not unique).
+
+    python benchmark_neighbors.py --scale 1 10 50
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.neighbors import KNeighborsClassifier
+
+from knn_sdg_imputation import encode_features, prepare_features
+from neighbors import BACKENDS, make_index, vote
+from storage import read_table
+
+warnings.filterwarnings("ignore")
+
+K_VALUES = [5, 10, 15, 20, 25]
+
+
+def load_features():
+    df = read_table("merged_dataset")
+    known, unknown = df[df["sdg_id"].notna()], df[df["sdg_id"].isna()]
+    X_known, num_cols, cat_cols = prepare_features(known)
+    X_unknown, _, _ = prepare_features(unknown)
+    X_known, X_unknown = encode_features(X_known, X_unknown, num_cols, cat_cols)
+    return X_known.to_numpy(dtype=float), X_unknown.to_numpy(dtype=float), known["sdg_id"].values
+
+
+def replicate(X, scale, rng, jitter=0.01):
+    if scale == 1:
+        return X
+    reps = np.tile(X, (scale, 1))
+    return reps + rng.normal(scale=jitter, size=reps.shape)
+
+
+def sklearn_loop(X, y, X_query):
+    skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    scores = {
+        k: cross_val_score(KNeighborsClassifier(n_neighbors=k, weights="distance"), X, y, cv=skf).mean()
+        for k in K_VALUES
+    }
+    best_k = max(scores, key=scores.get)
+    KNeighborsClassifier(n_neighbors=best_k, weights="distance").fit(X, y).predict_proba(X_query)
+    return scores
+
+
+def index_loop(backend, X, y, X_query):
+    classes = np.unique(y)
+    y_codes = np.searchsorted(classes, y)
+    skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    scores = {k: [] for k in K_VALUES}
+    for train_idx, val_idx in skf.split(X, y):
+        dist, ind = make_index(backend, X[train_idx]).query(X[val_idx], max(K_VALUES))
+        for k in K_VALUES:
+            proba = vote(dist, ind, y_codes[train_idx], len(classes), k)
+            scores[k].append(accuracy_score(y[val_idx], classes[proba.argmax(axis=1)]))
+    scores = {k: np.mean(s) for k, s in scores.items()}
+    best_k = max(scores, key=scores.get)
+    make_index(backend, X).query(X_query, best_k)
+    return scores
+
+
+def recall(backend, X, X_query, k, exact_kth):
+    dist, _ = make_index(backend, X).query(X_query, k)
+    return (dist <= exact_kth[:, None] + 1e-9).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    X_known, X_unknown, y_known = load_features()
+    rng = np.random.default_rng(0)
+    k = max(K_VALUES)
+
+    rows = []
+    for scale in args.scale:
+        X = replicate(X_known, scale, rng)
+        y = np.tile(y_known, scale)
+        X_query = replicate(X_unknown, scale, rng)
+        exact_kth = make_index("brute", X).query(X_query, k)[0][:, -1]
+
+        start = time.perf_counter()
+        scores = sklearn_loop(X, y, X_query)
+        baseline = time.perf_counter() - start
+        rows.append({"scale": scale, "known_rows": len(X), "method": "sklearn loop",
+                     "seconds": baseline, "speedup": 1.0, "recall@25": 1.0, "cv_acc_k5": scores[5]})
+
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            scores = index_loop(backend, X, y, X_query)
+            seconds = time.perf_counter() - start
+            rows.append({
+                "scale": scale, "known_rows": len(X), "method": backend,
+                "seconds": seconds, "speedup": baseline / seconds,
+                "recall@25": recall(backend, X, X_query, k, exact_kth), "cv_acc_k5": scores[5],
+            })
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Scaling of parallel_scoring.predict_parallel with the number of workers.
+
+Rows of the processed test set are replicated to --rows and scored by the
+saved scope models, once in-process (predict_scopes) and then sharded over
+each worker count. Speedup and efficiency are relative to the in-process
+run; outputs are checked to match it row for row.
+
+    python benchmark_parallel_scoring.py --rows 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from parallel_scoring import predict_parallel
+from predict_both_scopes import load_models, predict_scopes
+from storage import read_table
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    n_cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, n_cores} & set(range(1, n_cores + 1))))
+    parser.add_argument("--compiled", action="store_true")
+    args = parser.parse_args()
+
+    feature_cols, best_scope1, best_scope2 = load_models(compiled=args.compiled)
+    base = read_table("test_after_feature_engineering")
+    df = base.iloc[np.arange(args.rows) % len(base)].reset_index(drop=True)
+
+    reference, seconds = timed(lambda: predict_scopes(df, feature_cols, best_scope1, best_scope2))
+    rows = [{"workers": "in-process", "seconds": seconds, "speedup": 1.0, "efficiency": np.nan, "identical": True}]
+    baseline = seconds
+    for n in args.workers:
+        out, seconds = timed(lambda: predict_parallel(df, feature_cols, best_scope1, best_scope2, n_workers=n))
+        rows.append({
+            "workers": n, "seconds": seconds, "speedup": baseline / seconds,
+            "efficiency": baseline / seconds / n, "identical": out.equals(reference),
+        })
+
+    report = pd.DataFrame(rows)
+    print(f"Rows: {len(df)}, cores: {n_cores}, models: {type(best_scope1).__name__} / {type(best_scope2).__name__}")
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Scaling of process_entity_data.py: per-entity groupby.apply vs the
+vectorized implementation.
+
+Entities are sampled with replacement from merged_dataset (with all their
+exploded rows) and given fresh ids. The apply version is only timed up to
+--apply-max entities, since it makes one Python call per entity:
+
+    python benchmark_process_entities.py --entities 1000 100000 1000000
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from process_entity_data import process_entities, process_entities_apply
+from storage import read_table
+
+warnings.filterwarnings("ignore")
+
+
+def synthetic(df, n_entities, seed=0):
+    groups = df.groupby("entity_id").indices
+    ids = np.array(list(groups))
+    picked = np.random.default_rng(seed).choice(ids, size=n_entities)
+    sizes = np.array([len(groups[i]) for i in picked])
+    rows = np.concatenate([groups[i] for i in picked])
+    out = df.iloc[rows].reset_index(drop=True)
+    out["entity_id"] = np.repeat(np.arange(n_entities), sizes)
+    # Shuffle so the sort is not handed pre-grouped input
+    return out.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    result = fn(df)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--apply-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    base = read_table("merged_dataset")
+    rows = []
+    for n in args.entities:
+        df = synthetic(base, n)
+        vec, vec_s = timed(process_entities, df)
+        row = {"entities": n, "rows": len(df), "vectorized_s": vec_s, "apply_s": np.nan,
+               "speedup": np.nan, "identical": None}
+        if n <= args.apply_max:
+            ref, apply_s = timed(process_entities_apply, df)
+            row.update(apply_s=apply_s, speedup=apply_s / vec_s, identical=ref.equals(vec))
+        rows.append(row)
+        print(f"{n:>9} entities done", flush=True)
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
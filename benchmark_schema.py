@@ -0,0 +1,76 @@
+"""
+Memory of every source table and checkpoint as loaded vs under the compact
+schema (schema.py), plus the time of one full-frame copy in each layout.
+Rows are replicated to --scale x the table size to see how it grows:
+
+    python benchmark_schema.py --scale 1 100
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import compact, frame_mb
+from storage import read_table
+
+SOURCES = [
+    "data/train.csv",
+    "data/test.csv",
+    "data/environmental_activities.csv",
+    "data/revenue_distribution_by_sector.csv",
+    "data/sustainable_development_goals.csv",
+]
+CHECKPOINTS = [
+    "merged_dataset",
+    "merged_dataset_imputed_activity",
+    "merged_dataset_imputed_sdg",
+    "merged_dataset_complete",
+    "data_after_feature_extraction",
+]
+
+
+def copy_seconds(df, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df.copy()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_tables():
+    tables = {os.path.splitext(os.path.basename(p))[0]: pd.read_csv(p) for p in SOURCES}
+    for name in CHECKPOINTS:
+        try:
+            tables[name] = read_table(name)
+        except FileNotFoundError:
+            continue
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 100])
+    args = parser.parse_args()
+
+    rows = []
+    for name, df in load_tables().items():
+        for scale in args.scale:
+            wide = pd.concat([df] * scale, ignore_index=True) if scale > 1 else df
+            small = compact(wide.copy(), enabled=True)
+            before, after = frame_mb(wide), frame_mb(small)
+            rows.append({
+                "table": name, "scale": scale, "rows": len(wide), "mb": before, "compact_mb": after,
+                "ratio": before / after, "copy_ms": copy_seconds(wide) * 1e3,
+                "compact_copy_ms": copy_seconds(small) * 1e3,
+            })
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Latency of the two-process scoring chain vs the in-process Scorer.
+
+    python benchmark_scoring.py --repeats 5
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def time_subprocess_chain():
+    start = time.perf_counter()
+    for script in ["process_test_data.py", "predict_both_scopes.py"]:
+        subprocess.run([sys.executable, script], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    chain = [time_subprocess_chain() for _ in range(args.repeats)]
+
+    start = time.perf_counter()
+    from scoring import Scorer
+    scorer = Scorer()
+    load_time = time.perf_counter() - start
+
+    df_test_raw = pd.read_csv("data/test.csv")
+    batch = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        scorer.predict(df_test_raw)
+        batch.append(time.perf_counter() - start)
+
+    single = []
+    for _, row in df_test_raw.head(50).iterrows():
+        start = time.perf_counter()
+        scorer.predict(row.to_frame().T.infer_objects())
+        single.append(time.perf_counter() - start)
+
+    report = pd.DataFrame([
+        {"path": "subprocess chain (full batch)", "median_ms": np.median(chain) * 1e3},
+        {"path": "in-process load (imports + models)", "median_ms": load_time * 1e3},
+        {"path": "in-process predict (full batch)", "median_ms": np.median(batch) * 1e3},
+        {"path": "in-process predict (1 entity)", "median_ms": np.median(single) * 1e3},
+    ])
+    print(f"Batch size: {len(df_test_raw)} entities, repeats: {args.repeats}")
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.1f}"))
+    print(f"\nSpeedup per warm batch: {np.median(chain) / np.median(batch):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
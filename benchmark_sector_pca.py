@@ -0,0 +1,93 @@
+"""
+Sector_Comp_* fit + transform: dense pivot_table + StandardScaler + PCA vs
+the sparse entity x sector path in feature_pipeline.py.
+
+Synthetic portfolios draw 1-4 sectors per entity from the real sector codes
+with Dirichlet revenue shares. The dense path is only run up to --dense-max
+entities. It uses the exact (full) SVD solver: PCA's default switches to a
+randomized solver above 500 rows, which only approximates the components.
+
+    python benchmark_sector_pca.py --entities 10000 100000 1000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import MAX_SECTOR_COMPONENTS, fit_standardized_pca_sparse, sector_matrix
+
+
+def synthetic_revenue(n_entities, sector_codes, seed=0):
+    rng = np.random.default_rng(seed)
+    n_sectors = rng.integers(1, 5, size=n_entities)
+    entity_id = np.repeat(np.arange(n_entities), n_sectors)
+    shares = rng.dirichlet(np.ones(4), size=n_entities)
+    revenue_pct = np.concatenate([s[:k] / s[:k].sum() for s, k in zip(shares, n_sectors)])
+    return pd.DataFrame({
+        "entity_id": entity_id,
+        "nace_level_2_code": rng.choice(sector_codes, size=len(entity_id)),
+        "revenue_pct": revenue_pct,
+    })
+
+
+def dense_sector_comps(df):
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
+
+    rev_pivot = df.pivot_table(
+        index="entity_id", columns="nace_level_2_code", values="revenue_pct",
+        aggfunc="sum", fill_value=0.0,
+    )
+    scaled = StandardScaler().fit_transform(rev_pivot.values)
+    n_components = min(MAX_SECTOR_COMPONENTS, *scaled.shape)
+    return PCA(n_components=n_components, svd_solver="full").fit_transform(scaled)
+
+
+def sparse_sector_comps(df):
+    codes = pd.Index(np.sort(df["nace_level_2_code"].unique()))
+    X = sector_matrix(df, np.sort(df["entity_id"].unique()), codes)
+    n_components = min(MAX_SECTOR_COMPONENTS, *X.shape)
+    mean, scale, components = fit_standardized_pca_sparse(X, n_components)
+    return X @ (components / scale).T - (mean / scale) @ components.T
+
+
+def measure(fn, df):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(df)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dense-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    sector_codes = pd.read_csv("data/revenue_distribution_by_sector.csv")["nace_level_2_code"].dropna().unique()
+
+    rows = []
+    for n in args.entities:
+        df = synthetic_revenue(n, sector_codes)
+        comps, seconds, peak = measure(sparse_sector_comps, df)
+        rows.append({"entities": n, "method": "sparse", "seconds": seconds, "peak_mb": peak, "max_abs_diff": np.nan})
+        if n <= args.dense_max:
+            dense, seconds, peak = measure(dense_sector_comps, df)
+            rows.append({
+                "entities": n, "method": "dense", "seconds": seconds, "peak_mb": peak,
+                "max_abs_diff": np.abs(dense - comps).max(),
+            })
+
+    report = pd.DataFrame(rows)
+    print(f"Sectors: {len(sector_codes)}")
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+
+
+if __name__ == "__main__":
+    main()
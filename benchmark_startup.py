@@ -0,0 +1,88 @@
+"""
+Cold-start time of the scoring path: interpreter start to first prediction.
+
+Each repeat starts a fresh `python -X importtime` process that imports
+scoring, builds a Scorer (models, FeaturePipeline, child tables) and scores
+one test entity, once with the joblib models and once with --compiled
+(compiled_trees.py, no estimator library). Reported per mode: median
+seconds from process spawn to the end of each phase, and the packages with
+the largest import time in the last repeat (self time of all their
+modules, so the rows add up):
+
+    python benchmark_startup.py --repeat 5 --top 12
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+CHILD = """
+import json, sys, time
+marks = {}
+import scoring
+marks["import"] = time.time()
+import pandas as pd
+entities = pd.read_csv("data/test.csv", nrows=1)
+scorer = scoring.Scorer(compiled=COMPILED)
+marks["scorer"] = time.time()
+scorer.predict(entities)
+marks["first_prediction"] = time.time()
+heavy = ["catboost", "xgboost", "sklearn", "scipy", "matplotlib", "seaborn", "psutil"]
+marks["loaded"] = [m for m in heavy if m in sys.modules]
+print(json.dumps(marks))
+"""
+
+
+def import_times(stderr):
+    """Import seconds per root package (sum of its modules' self times)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        rows.append({"package": name.strip().split(".")[0], "import_s": int(self_us) / 1e6})
+    return pd.DataFrame(rows).groupby("package")["import_s"].sum().sort_values(ascending=False)
+
+
+def cold_start(compiled):
+    code = CHILD.replace("COMPILED", str(compiled))
+    start = time.time()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    marks = json.loads(result.stdout.strip().splitlines()[-1])
+    phases = {k: marks[k] - start for k in ("import", "scorer", "first_prediction")}
+    return phases, marks["loaded"], import_times(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    rows, imports = [], {}
+    for mode, compiled in (("joblib", False), ("compiled", True)):
+        runs = [cold_start(compiled) for _ in range(args.repeat)]
+        phases = pd.DataFrame([phases for phases, _, _ in runs]).median()
+        rows.append({"mode": mode, **phases.to_dict(), "heavy_modules": ",".join(runs[-1][1])})
+        imports[mode] = runs[-1][2]
+
+    start = time.time()
+    subprocess.run([sys.executable, "-c", "pass"])
+    bare = time.time() - start
+
+    print(f"Seconds from process start (median of {args.repeat}); bare interpreter: {bare:.3f}s")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    top = pd.DataFrame(imports).fillna(0.0)
+    top = top.loc[top.max(axis=1).sort_values(ascending=False).index[:args.top]]
+    print("\nImport time by package (s, -X importtime self times)")
+    print(top.to_string(float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Read/write time and file size of each pipeline checkpoint per storage format.
+
+Every checkpoint found under data/ is written and read back in each format
+(full read and a two-column selective read) in a scratch directory:
+
+    python benchmark_storage.py --repeats 5 --scale 10
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import FORMATS, HAS_PYARROW, read_table, write_table
+
+CHECKPOINTS = [
+    "train_outliers_fixed",
+    "environmental_activities_outliers_fixed",
+    "merged_dataset",
+    "merged_entities",
+    "merged_dataset_imputed_activity",
+    "merged_dataset_imputed_sdg",
+    "merged_dataset_complete",
+    "data_after_feature_extraction",
+    "data_after_feature_engineering",
+    "test_after_feature_engineering",
+]
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=1, help="replicate each checkpoint N times")
+    args = parser.parse_args()
+
+    formats = FORMATS if HAS_PYARROW else ("csv",)
+    rows = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for name in CHECKPOINTS:
+            try:
+                df = read_table(name)
+            except FileNotFoundError:
+                continue
+            if args.scale > 1:
+                df = pd.concat([df] * args.scale, ignore_index=True)
+            columns = ["entity_id", df.columns[-1]]
+
+            for fmt in formats:
+                path = write_table(df, name, fmt=fmt, data_dir=scratch, export_csv=False)
+                rows.append({
+                    "checkpoint": name,
+                    "format": fmt,
+                    "rows": len(df),
+                    "size_kb": os.path.getsize(path) / 1e3,
+                    "write_ms": timed(lambda: write_table(df, name, fmt=fmt, data_dir=scratch, export_csv=False), args.repeats),
+                    "read_ms": timed(lambda: read_table(name, fmt=fmt, data_dir=scratch), args.repeats),
+                    "read_2col_ms": timed(lambda: read_table(name, columns=columns, fmt=fmt, data_dir=scratch), args.repeats),
+                })
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.1f}"))
+
+    print("\nTotals per format:")
+    print(report.groupby("format")[["size_kb", "write_ms", "read_ms", "read_2col_ms"]].sum().round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
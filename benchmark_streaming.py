@@ -0,0 +1,98 @@
+"""
+Whole-file vs chunked scoring (scoring.predict_csv) on a synthetic universe.
+
+Test entities are replicated with fresh ids, each copy bringing its own
+activity/SDG/revenue rows, and written to a temporary CSV. Peak traced
+memory covers reading, merging, transforming and predicting; the child
+tables and models are loaded before measuring. The whole-file path is only
+run up to --full-max entities:
+
+    python benchmark_streaming.py --entities 10000 100000 1000000 --chunk-size 50000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from scoring import Scorer, predict_csv
+
+
+def replicate(df, n_copies, id_offset):
+    out = pd.concat([df] * n_copies, ignore_index=True)
+    out["entity_id"] = out["entity_id"] + np.repeat(np.arange(n_copies) * id_offset, len(df))
+    return out
+
+
+def synthetic_universe(n_entities):
+    test = pd.read_csv("data/test.csv")
+    children = {
+        "env": pd.read_csv("data/environmental_activities.csv"),
+        "sdg": pd.read_csv("data/sustainable_development_goals.csv"),
+        "revenue": pd.read_csv("data/revenue_distribution_by_sector.csv"),
+    }
+    test = test[test["entity_id"].notna()]
+    n_copies = -(-n_entities // len(test))
+    id_offset = int(max(test["entity_id"].max(), *(c["entity_id"].max() for c in children.values()))) + 1
+    test_ids = set(test["entity_id"])
+    entities = replicate(test, n_copies, id_offset).head(n_entities)
+    children = {
+        name: replicate(c[c["entity_id"].isin(test_ids)], n_copies, id_offset)
+        for name, c in children.items()
+    }
+    return entities, children
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--full-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        in_path = os.path.join(tmp, "entities.csv")
+        for n in args.entities:
+            entities, children = synthetic_universe(n)
+            entities.to_csv(in_path, index=False)
+            scorer = Scorer(env=children["env"], sdg=children["sdg"], revenue=children["revenue"])
+            del entities, children
+
+            out_path = os.path.join(tmp, "chunked.csv")
+            seconds, peak = measure(lambda: predict_csv(in_path, out_path, args.chunk_size, scorer))
+            rows.append({"entities": n, "mode": f"chunks of {args.chunk_size}", "seconds": seconds,
+                         "peak_mb": peak, "max_rel_diff": np.nan})
+
+            if n <= args.full_max:
+                full_path = os.path.join(tmp, "full.csv")
+                seconds, peak = measure(
+                    lambda: scorer.predict(pd.read_csv(in_path)).to_csv(full_path, index=False)
+                )
+                full = pd.read_csv(full_path).sort_values("entity_id").reset_index(drop=True)
+                chunked = pd.read_csv(out_path).sort_values("entity_id").reset_index(drop=True)
+                cols = ["pred_target_scope_1", "pred_target_scope_2"]
+                rows.append({"entities": n, "mode": "whole file", "seconds": seconds, "peak_mb": peak,
+                             "max_rel_diff": np.abs(chunked[cols].values / full[cols].values - 1).max()})
+            print(f"{n:>9} entities done", flush=True)
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+
+
+if __name__ == "__main__":
+    main()
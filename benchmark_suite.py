@@ -0,0 +1,174 @@
+"""
+Per-stage timings of the whole pipeline on synthetic data, with stored
+results for regression checks.
+
+For each --entities scale, synthetic_data.py generates the five source
+tables into <workdir>/<n>/data and the committed models/ are copied next to
+them. Then every pipeline_runner.py stage plus scoring
+(run_test_predictions.py) runs there as a subprocess under
+instrumentation.py, which records each stage's wall/CPU time, peak RSS and
+rows. Training is skipped above --train-max entities, and scoring then uses
+the committed models. Backend switches pass through the environment as
+usual; the exact GradientBoosting imputer takes minutes at 10k entities, so
+use GB_BACKEND=hist for the larger scales.
+
+Each stage result is appended to --results as a JSON line with the commit,
+host and scale. It is then compared with the latest earlier result for the
+same stage, scale and host. A stage more than --tolerance slower (and at
+least --min-seconds slower) is reported as a regression; with --check the
+exit code is then 1:
+
+    python benchmark_suite.py --entities 10000 100000 1000000 --train-max 10000
+    python benchmark_suite.py --entities 10000 --check
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+
+import pandas as pd
+
+from instrumentation import PROFILE_ENV, RUN_ENV, load_records
+from pipeline_runner import ROOT, STAGES
+from synthetic_data import generate, load_sources, write_tables
+
+SCORING = ["run_test_predictions.py"]
+RESULTS_PATH = "logs/benchmark_suite.jsonl"
+
+
+def git_commit():
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def prepare(workdir, n_entities, seed, sources):
+    shutil.rmtree(workdir, ignore_errors=True)
+    start = time.perf_counter()
+    write_tables(generate(n_entities, seed, sources), os.path.join(workdir, "data"))
+    generate_s = time.perf_counter() - start
+    shutil.copytree(os.path.join(ROOT, "models"), os.path.join(workdir, "models"))
+    for sub in ("plots", "logs"):
+        os.makedirs(os.path.join(workdir, sub), exist_ok=True)
+    return generate_s
+
+
+def stage_commands(train_max, n_entities, train_args):
+    commands = []
+    for stage in STAGES:
+        if stage.name == "training_model":
+            if n_entities > train_max:
+                print(f"[skip] training_model above --train-max {train_max}")
+                continue
+            commands.append((stage.name, stage.command + train_args))
+        else:
+            commands.append((stage.name, stage.command))
+    commands.append(("scoring", SCORING))
+    return commands
+
+
+def run_scale(n_entities, args, sources, run):
+    workdir = os.path.join(args.workdir, str(n_entities))
+    generate_s = prepare(workdir, n_entities, args.seed, sources)
+    print(f"\n{n_entities} entities: generated in {generate_s:.1f}s ({workdir})")
+
+    profile = os.path.join(workdir, "profile.jsonl")
+    env = dict(os.environ, MPLBACKEND="Agg")
+    env[PROFILE_ENV], env[RUN_ENV] = profile, run
+    rows = []
+    for name, command in stage_commands(args.train_max, n_entities, args.train_args):
+        print(f"[run] {name}", flush=True)
+        script = [os.path.join(ROOT, command[0])] + command[1:]
+        result = subprocess.run(
+            [sys.executable, os.path.join(ROOT, "instrumentation.py"), "run"] + script,
+            cwd=workdir, env=env, capture_output=True, text=True, timeout=args.timeout,
+        )
+        if result.returncode != 0:
+            print(f"[failed] {name} (exit code {result.returncode})")
+            print(result.stderr[-2000:])
+        stage = load_records(profile, run)
+        stage = stage[stage["kind"] == "stage"].iloc[-1]
+        rows.append({
+            "stage": name, "status": "ok" if result.returncode == 0 else "failed",
+            "wall_s": stage["wall_s"], "cpu_s": stage["cpu_s"], "peak_rss_mb": stage["peak_rss_mb"],
+            "rows_in": stage["rows_in"], "rows_out": stage["rows_out"],
+        })
+        if result.returncode != 0:
+            break
+    if not args.keep:
+        shutil.rmtree(os.path.join(workdir, "data"), ignore_errors=True)
+    return rows
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_json(path, lines=True)
+
+
+def compare(current, history, tolerance, min_seconds):
+    """current with the previous wall time of each stage and a regression flag."""
+    current = current.copy()
+    current["prev_wall_s"] = float("nan")
+    if len(history):
+        ok = history[history["status"] == "ok"]
+        previous = ok.groupby(["host", "entities", "stage"])["wall_s"].last()
+        keys = pd.MultiIndex.from_frame(current[["host", "entities", "stage"]])
+        current["prev_wall_s"] = previous.reindex(keys).to_numpy()
+    current["ratio"] = current["wall_s"] / current["prev_wall_s"]
+    current["regression"] = (current["ratio"] > 1 + tolerance) & \
+        (current["wall_s"] - current["prev_wall_s"] > min_seconds)
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--train-max", type=int, default=10_000)
+    parser.add_argument("--train-args", nargs="*", default=["--halving"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default="synthetic")
+    parser.add_argument("--results", default=RESULTS_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per stage")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic data and checkpoints")
+    parser.add_argument("--check", action="store_true", help="exit with 1 on a regression")
+    args = parser.parse_args()
+    args.workdir = os.path.abspath(args.workdir)
+
+    run = uuid.uuid4().hex[:12]
+    sources = load_sources()
+    meta = {
+        "run": run, "ts": pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds"),
+        "commit": git_commit(), "host": platform.node(), "cpus": os.cpu_count(),
+    }
+    rows = []
+    for n_entities in args.entities:
+        for row in run_scale(n_entities, args, sources, run):
+            rows.append({**meta, "entities": n_entities, **row})
+    current = pd.DataFrame(rows)
+
+    report = compare(current, load_results(args.results), args.tolerance, args.min_seconds)
+    os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+    with open(args.results, "a") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str) + "\n")
+
+    columns = ["entities", "stage", "status", "wall_s", "cpu_s", "peak_rss_mb", "rows_in", "rows_out",
+               "prev_wall_s", "ratio", "regression"]
+    print(f"\nRun {run} at {meta['commit']} on {meta['host']} (results in {args.results})")
+    print(report[columns].to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+    regressions = report[report["regression"]]
+    if len(regressions):
+        print(f"\n{len(regressions)} stage(s) slower than {1 + args.tolerance:.2f}x the previous run")
+    sys.exit(1 if args.check and len(regressions) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Chart functions for the analysis and pipeline scripts.
+
+Each function draws one chart on a new figure from the data it is given and
+returns the figure; plot_renderer.PlotRenderer saves and closes it, in a
+worker process when several charts are queued. pyplot and seaborn are only
+imported when a chart is drawn, so the scripts don't pay for them with
+plotting off.
+"""
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# trend_n_distribution_analysis.py
+
+def distribution_hist(s, title):
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(6, 4))
+    sns.histplot(s, kde=True)
+    plt.title(title)
+    plt.tight_layout()
+    return fig
+
+
+def distribution_box(s, title):
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(4, 4))
+    sns.boxplot(x=s)
+    plt.title(title)
+    plt.tight_layout()
+    return fig
+
+
+def scatter(x, y, title, xlabel, ylabel):
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(6, 6))
+    sns.scatterplot(x=x, y=y)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.tight_layout()
+    return fig
+
+
+def lowess(x, y):
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(8, 6))
+    sns.regplot(x=x, y=y, lowess=True, scatter_kws={'s': 10}, line_kws={'color': 'red'})
+    plt.xlabel("log(target_scope_1)")
+    plt.ylabel("target_scope_2")
+    plt.title("LOWESS Smoothed Trend Between target_scope_1 and target_scope_2")
+    plt.tight_layout()
+    return fig
+
+
+def hexbin(x, y):
+    plt = _pyplot()
+    fig = plt.figure(figsize=(8, 6))
+    plt.hexbin(x, y, gridsize=40, mincnt=1)
+    plt.colorbar(label="counts")
+    plt.xlabel("log(target_scope_1)")
+    plt.ylabel("target_scope_2")
+    plt.title("Hexbin Density Plot")
+    return fig
+
+
+def kde2d(x, y):
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure()
+    sns.kdeplot(x=x, y=y, fill=True, levels=30, thresh=0.05)
+    plt.xlabel("log(target_scope_1)")
+    plt.ylabel("target_scope_2")
+    plt.title("2D KDE")
+    plt.tight_layout()
+    return fig
+
+
+# outlier_treatment.py
+
+def hist_before_after(sb, sa, name):
+    import seaborn as sns
+    plt = _pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(10, 4))
+    sns.histplot(sb, kde=True, ax=axes[0])
+    axes[0].set_title(f"{name} before")
+    sns.histplot(sa, kde=True, ax=axes[1])
+    axes[1].set_title(f"{name} after")
+    fig.tight_layout()
+    return fig
+
+
+def box_before_after(sb, sa, name):
+    import seaborn as sns
+    plt = _pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(8, 4))
+    sns.boxplot(x=sb, ax=axes[0])
+    axes[0].set_title(f"{name} before")
+    sns.boxplot(x=sa, ax=axes[1])
+    axes[1].set_title(f"{name} after")
+    fig.tight_layout()
+    return fig
+
+
+# environmental_analysis.py
+
+def env_scores_multi(codes, y, activity_type):
+    import numpy as np
+    plt = _pyplot()
+    x = np.arange(len(y))
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
+
+    axes[0].scatter(x, y)
+    axes[0].set_xticks(x)
+    axes[0].set_xticklabels(codes, rotation=60, ha="right")
+    axes[0].set_ylabel("env_score_adjustment")
+    axes[0].set_title("Scatter")
+
+    axes[1].hist(y, bins=10, density=True)
+    axes[1].set_title("Density")
+
+    h = axes[2].hist2d(x, y, bins=(len(y), 10))
+    fig.colorbar(h[3], ax=axes[2])
+    axes[2].set_xticks(x)
+    axes[2].set_xticklabels(codes, rotation=60, ha="right")
+    axes[2].set_title("Heatmap")
+
+    fig.suptitle(activity_type)
+    fig.tight_layout()
+    return fig
+
+
+# knn_sdg_imputation.py
+
+def confusion_heatmap(cm, labels, title):
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(12, 10))
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', xticklabels=labels, yticklabels=labels)
+    plt.title(title)
+    plt.ylabel('True SDG')
+    plt.xlabel('Predicted SDG')
+    plt.tight_layout()
+    return fig
+
+
+def confidence_analysis(max_proba, correct_mask):
+    plt = _pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+    # Overall confidence distribution
+    axes[0].hist(max_proba, bins=20, edgecolor='black', alpha=0.7)
+    axes[0].set_xlabel('Prediction Confidence (Max Probability)')
+    axes[0].set_ylabel('Frequency')
+    axes[0].set_title('Distribution of Prediction Confidence')
+    axes[0].axvline(max_proba.mean(), color='red', linestyle='--',
+                    label=f'Mean: {max_proba.mean():.3f}')
+    axes[0].legend()
+
+    # Confidence by correctness
+    axes[1].hist(max_proba[correct_mask], bins=15, alpha=0.6, label='Correct',
+                 edgecolor='black')
+    axes[1].hist(max_proba[~correct_mask], bins=15, alpha=0.6, label='Incorrect',
+                 edgecolor='black')
+    axes[1].set_xlabel('Prediction Confidence (Max Probability)')
+    axes[1].set_ylabel('Frequency')
+    axes[1].set_title('Confidence: Correct vs Incorrect Predictions')
+    axes[1].legend()
+
+    plt.tight_layout()
+    return fig
+
+
+# model_analysis.py (seaborn's whitegrid theme; the renderer restores rcParams after each chart)
+
+def metric_comparison(df, metric, label):
+    """Validation vs test values of one metric per model, one panel per target."""
+    import seaborn as sns
+    plt = _pyplot()
+    sns.set(style="whitegrid")
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    for i, target in enumerate(df["target"].unique()):
+        df_t = df[df["target"] == target]
+        plot_df = df_t.melt(
+            id_vars=["phase", "target", "model"],
+            value_vars=[f"val_{metric}", f"test_{metric}"],
+            var_name="dataset",
+            value_name="value"
+        )
+        plot_df["dataset"] = plot_df["dataset"].map({f"val_{metric}": "Validation", f"test_{metric}": "Test"})
+        sns.barplot(data=plot_df, x="model", y="value", hue="dataset", ax=axes[i])
+        axes[i].set_title(f"{label}: Validation vs Test\n{target}")
+        axes[i].set_xlabel("Model")
+        axes[i].set_ylabel(label)
+        axes[i].tick_params(axis='x', rotation=45)
+    plt.tight_layout()
+    return fig
+
+
+def test_performance_summary(df):
+    import seaborn as sns
+    plt = _pyplot()
+    sns.set(style="whitegrid")
+    fig, axes = plt.subplots(2, 3, figsize=(16, 10))
+    metrics = [("test_mae", "Test MAE"), ("test_rmse", "Test RMSE"), ("test_r2", "Test R²")]
+    for i, target in enumerate(df["target"].unique()):
+        df_t = df[df["target"] == target]
+        for j, (col, label) in enumerate(metrics):
+            sns.barplot(data=df_t, x="model", y=col, hue="phase", ax=axes[i, j])
+            axes[i, j].set_title(f"{label}\n{target}")
+            axes[i, j].set_xlabel("Model")
+            axes[i, j].set_ylabel(label)
+            axes[i, j].tick_params(axis='x', rotation=45)
+            axes[i, j].legend(fontsize=8)
+    plt.tight_layout()
+    return fig
+
+
+def r2_baseline_vs_tuned(df, col, split):
+    import seaborn as sns
+    plt = _pyplot()
+    sns.set(style="whitegrid")
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    for i, target in enumerate(df["target"].unique()):
+        df_t = df[df["target"] == target]
+        sns.barplot(data=df_t, x="model", y=col, hue="phase_label", ax=axes[i])
+        axes[i].set_title(f"{split} R²: Baseline vs Tuned\n{target}")
+        axes[i].set_xlabel("Model")
+        axes[i].set_ylabel("R²")
+        axes[i].tick_params(axis='x', rotation=45)
+        axes[i].legend(title="Phase")
+    plt.tight_layout()
+    return fig
+
+
+def r2_by_target(df, col, split):
+    import seaborn as sns
+    plt = _pyplot()
+    sns.set(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(12, 5))
+    sns.barplot(data=df, x="model", y=col, hue="target_label", ax=ax)
+    ax.set_title(f"{split} R² by Model and Target")
+    ax.set_xlabel("Model")
+    ax.set_ylabel("R²")
+    ax.legend(title="Target")
+    plt.tight_layout()
+    return fig
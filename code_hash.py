@@ -0,0 +1,39 @@
+"""
+File and source hashing shared by pipeline_runner.py (stage fingerprints)
+and incremental_scoring.py (scoring fingerprint).
+"""
+
+import ast
+import hashlib
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def hash_file(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest
+
+
+def local_modules(script, seen=None):
+    """The script plus every repo-level module it imports, transitively."""
+    seen = seen if seen is not None else set()
+    if script in seen:
+        return seen
+    seen.add(script)
+    with open(os.path.join(ROOT, script)) as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        names = []
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        for name in names:
+            module = name.split(".")[0] + ".py"
+            if os.path.exists(os.path.join(ROOT, module)):
+                local_modules(module, seen)
+    return seen
@@ -0,0 +1,367 @@
+"""
+Flat-array export of the saved tree models and a NumPy evaluator for them.
+
+A trained CatBoost, XGBoost or sklearn forest is flattened into per-node
+arrays (feature, threshold, left/right/missing child, leaf value) covering
+all of its trees. Prediction walks every row through every tree at once,
+one tree level per step, over a contiguous float32 matrix, so it needs no
+estimator library, no pandas validation and no per-call conversions.
+
+Every split is normalised to "go left if x <= threshold" in float32, and
+leaves point to themselves so all trees can be walked for max depth steps.
+CatBoost's oblivious trees additionally get per-level tables, grouped by
+tree depth, so a level is one column gather and compare for all trees of a
+group instead of a per-node walk. Linear models (the ElasticNet scope model)
+export as coef/intercept.
+
+CatBoost's own evaluator is still faster on bulk batches (CatBoost scope 1,
+1 CPU: 100 rows ~400k vs ~180k rows/s, 100k rows ~0.4M vs ~3M). A loaded
+CatBoost export hands batches of NATIVE_MIN_ROWS or more to the joblib model
+next to it, importing catboost on first use; without catboost installed the
+NumPy evaluator scores every batch.
+
+    python compiled_trees.py            # export models/*.joblib, check parity
+"""
+
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 4096
+# CatBoost's own evaluator overtakes the oblivious-tree walk at ~300 rows
+NATIVE_MIN_ROWS = 256
+
+
+def float32_floor(values):
+    """Largest float32 <= each value, so float32 x <= t matches x <= value."""
+    values = np.asarray(values, dtype=np.float64)
+    t32 = values.astype(np.float32)
+    above = t32.astype(np.float64) > values
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+class TreeBuilder:
+    """Accumulates nodes of several trees into flat arrays."""
+
+    def __init__(self, n_outputs):
+        self.n_outputs = n_outputs
+        self.feature, self.threshold = [], []
+        self.left, self.right, self.missing = [], [], []
+        self.value = []
+        self.roots = []
+        self.depth = 0
+
+    def add_node(self, feature=0, threshold=0.0, value=None):
+        node = len(self.feature)
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        # Leaves are their own children; split nodes are linked by link()
+        self.left.append(node)
+        self.right.append(node)
+        self.missing.append(node)
+        self.value.append(np.zeros(self.n_outputs) if value is None else value)
+        return node
+
+    def link(self, node, left, right, missing):
+        self.left[node], self.right[node], self.missing[node] = left, right, missing
+
+    def build(self, base, scale=1.0, oblivious=False):
+        return CompiledEnsemble(
+            feature=np.asarray(self.feature, dtype=np.int32),
+            threshold=float32_floor(self.threshold),
+            left=np.asarray(self.left, dtype=np.int32),
+            right=np.asarray(self.right, dtype=np.int32),
+            missing=np.asarray(self.missing, dtype=np.int32),
+            value=np.asarray(self.value, dtype=np.float64).reshape(-1, self.n_outputs),
+            roots=np.asarray(self.roots, dtype=np.int32),
+            depth=self.depth,
+            base=np.asarray(base, dtype=np.float64).reshape(self.n_outputs),
+            scale=scale,
+            oblivious=oblivious,
+        )
+
+
+class CompiledEnsemble:
+    def __init__(self, feature, threshold, left, right, missing, value, roots, depth, base,
+                 scale=1.0, oblivious=False, source="", native_path=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing = missing
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.base = base
+        self.scale = float(scale)
+        self.oblivious = bool(oblivious)
+        # Class of the exported estimator, and its joblib file (loaded on the
+        # first large batch)
+        self.source = str(source)
+        self.native_path = native_path
+        self._native = None
+        if self.oblivious:
+            self._build_level_tables()
+
+    @property
+    def n_outputs(self):
+        return self.value.shape[1]
+
+    def _build_level_tables(self):
+        # Oblivious trees, grouped by depth: per group one (feature, threshold)
+        # per tree and level; one (tree, leaf) value table in tree order, each
+        # tree's leaves in path order (root bit first)
+        node, tree_depth = self.roots, np.zeros(len(self.roots), dtype=np.int64)
+        while (split := self.left[node] != node).any():
+            tree_depth += split
+            node = self.left[node]
+        sizes = 2 ** tree_depth
+        self.leaf_offsets = np.r_[0, np.cumsum(sizes)[:-1]].astype(np.int32)
+        self.leaf_table = np.empty((sizes.sum(), self.n_outputs))
+
+        self.level_groups = []
+        for depth in np.unique(tree_depth):
+            trees = np.flatnonzero(tree_depth == depth)
+            roots = self.roots[trees]
+            level_nodes = [roots]
+            for _ in range(depth - 1):
+                level_nodes.append(self.left[level_nodes[-1]])
+            level_nodes = np.stack(level_nodes, axis=1)[:, :depth]
+            self.level_groups.append((
+                trees,
+                self.feature[level_nodes],
+                self.threshold[level_nodes],
+                self.missing[level_nodes] == self.right[level_nodes],
+            ))
+
+            leaf_nodes = roots[:, None]
+            for _ in range(depth):
+                leaf_nodes = np.stack([self.left[leaf_nodes], self.right[leaf_nodes]], axis=-1)
+                leaf_nodes = leaf_nodes.reshape(len(roots), -1)
+            rows = self.leaf_offsets[trees, None] + np.arange(2 ** depth)
+            self.leaf_table[rows.ravel()] = self.value[leaf_nodes.ravel()]
+
+    def leaves(self, XT):
+        """Leaf node per (tree, row) for a feature-major float32 matrix."""
+        rows = np.arange(XT.shape[1])
+        node = np.repeat(self.roots[:, None], XT.shape[1], axis=1)
+        for _ in range(self.depth):
+            x = XT[self.feature[node], rows]
+            node = np.where(
+                np.isnan(x),
+                self.missing[node],
+                np.where(x <= self.threshold[node], self.left[node], self.right[node]),
+            )
+        return node
+
+    def oblivious_leaves(self, XT):
+        """Row of leaf_table per (tree, row): one feature-row gather per level."""
+        has_nan = np.isnan(XT).any()
+        index = np.empty((len(self.roots), XT.shape[1]), dtype=np.int32)
+        for trees, feature, threshold, missing_right in self.level_groups:
+            depth = feature.shape[1]
+            group = np.zeros((len(trees), XT.shape[1]), dtype=np.int32)
+            for level in range(depth):
+                x = XT[feature[:, level]]
+                right = x > threshold[:, level, None]
+                if has_nan:
+                    right = np.where(np.isnan(x), missing_right[:, level, None], right)
+                group |= right.astype(np.int32) << (depth - 1 - level)
+            index[trees] = group
+        return index + self.leaf_offsets[:, None]
+
+    def native(self):
+        if self._native is None and self.native_path:
+            try:
+                self._native = joblib.load(self.native_path)
+            except ImportError:
+                # catboost isn't installed: the NumPy evaluator scores everything
+                self.native_path = None
+        return self._native
+
+    def delegates(self, n_rows):
+        """Whether predict() hands a batch of n_rows to the native model."""
+        return self.source.startswith("CatBoost") and n_rows >= NATIVE_MIN_ROWS and self.native() is not None
+
+    def predict(self, X):
+        if self.delegates(len(X)):
+            return self.native().predict(X)
+        X = as_float32(X)
+        out = np.empty((len(X), self.n_outputs))
+        for start in range(0, len(X), CHUNK_ROWS):
+            # Feature-major chunk: a feature's values for all rows are contiguous
+            XT = np.ascontiguousarray(X[start:start + CHUNK_ROWS].T)
+            if self.oblivious:
+                values = self.leaf_table[self.oblivious_leaves(XT)]
+            else:
+                values = self.value[self.leaves(XT)]
+            out[start:start + CHUNK_ROWS] = values.sum(axis=0)
+        out = self.base + self.scale * out
+        return out[:, 0] if self.n_outputs == 1 else out
+
+    def save(self, path):
+        fields = ["feature", "threshold", "left", "right", "missing", "value", "roots",
+                  "depth", "base", "scale", "oblivious", "source"]
+        np.savez(path, kind="trees", **{k: getattr(self, k) for k in fields})
+
+
+class CompiledLinear:
+    def __init__(self, coef, intercept):
+        self.coef = coef
+        self.intercept = intercept
+
+    def predict(self, X):
+        return as_float32(X).astype(np.float64) @ self.coef + self.intercept
+
+    def save(self, path):
+        np.savez(path, kind="linear", **self.__dict__)
+
+
+def as_float32(X):
+    if isinstance(X, pd.DataFrame):
+        X = X.to_numpy(dtype=np.float32)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def load_compiled(path):
+    with np.load(path) as data:
+        fields = {k: data[k] for k in data.files if k != "kind"}
+        kind = str(data["kind"])
+    if kind == "linear":
+        return CompiledLinear(**fields)
+    native_path = path[:-len(".npz")] + ".joblib" if path.endswith(".npz") else None
+    if native_path and not os.path.exists(native_path):
+        native_path = None
+    return CompiledEnsemble(**fields, native_path=native_path)
+
+
+def export_catboost(model):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as f:
+            spec = json.load(f)
+
+    float_features = spec["features_info"]["float_features"]
+    column = {f["feature_index"]: f["flat_feature_index"] for f in float_features}
+    # Missing values follow CatBoost's per-feature treatment (Min by default)
+    nan_left = {f["feature_index"]: f.get("nan_value_treatment") != "AsMax" for f in float_features}
+    scale, bias = spec["scale_and_bias"]
+    bias = np.atleast_1d(bias)
+    builder = TreeBuilder(n_outputs=len(bias))
+
+    for tree in spec["oblivious_trees"]:
+        splits = tree["splits"]
+        depth = len(splits)
+        leaf_values = np.asarray(tree["leaf_values"]).reshape(2 ** depth, builder.n_outputs)
+        builder.depth = max(builder.depth, depth)
+
+        # Oblivious tree: every node on a level uses the same split. Level l
+        # uses split depth-1-l, so the path bits spell the CatBoost leaf index.
+        def grow(level, leaf_index):
+            if level == depth:
+                return builder.add_node(value=leaf_values[leaf_index])
+            split = splits[depth - 1 - level]
+            node = builder.add_node(column[split["float_feature_index"]], split["border"])
+            left = grow(level + 1, leaf_index)
+            right = grow(level + 1, leaf_index | 1 << (depth - 1 - level))
+            builder.link(node, left, right, left if nan_left[split["float_feature_index"]] else right)
+            return node
+
+        builder.roots.append(grow(0, 0))
+    return builder.build(base=bias, scale=scale, oblivious=True)
+
+
+def export_sklearn_forest(model):
+    builder = TreeBuilder(n_outputs=1)
+    for est in model.estimators_:
+        tree = est.tree_
+        offset = len(builder.feature)
+        missing_left = getattr(tree, "missing_go_to_left", np.ones(tree.node_count, dtype=bool))
+        for i in range(tree.node_count):
+            if tree.children_left[i] == -1:
+                builder.add_node(value=tree.value[i].ravel()[:1])
+            else:
+                node = builder.add_node(tree.feature[i], tree.threshold[i])
+                left, right = offset + tree.children_left[i], offset + tree.children_right[i]
+                builder.link(node, left, right, left if missing_left[i] else right)
+        builder.roots.append(offset)
+        builder.depth = max(builder.depth, tree.max_depth)
+    return builder.build(base=0.0, scale=1.0 / len(model.estimators_))
+
+
+def export_xgboost(model):
+    # The JSON model keeps full-precision leaf values, unlike get_dump()
+    spec = json.loads(model.get_booster().save_raw(raw_format="json"))["learner"]
+    base_score = float(spec["learner_model_param"]["base_score"].strip("[]"))
+    builder = TreeBuilder(n_outputs=1)
+
+    for tree in spec["gradient_booster"]["model"]["trees"]:
+        offset = len(builder.feature)
+        left = np.asarray(tree["left_children"])
+        right = np.asarray(tree["right_children"])
+        depth = np.zeros(len(left), dtype=int)
+        for i in range(len(left)):
+            if left[i] == -1:
+                # Leaf values are stored in split_conditions
+                builder.add_node(value=[tree["split_conditions"][i]])
+                continue
+            depth[left[i]] = depth[right[i]] = depth[i] + 1
+            # XGBoost goes left on x < t, i.e. x <= the float32 just below t
+            threshold = np.nextafter(np.float32(tree["split_conditions"][i]), np.float32(-np.inf))
+            node = builder.add_node(tree["split_indices"][i], threshold)
+            missing = left[i] if tree["default_left"][i] else right[i]
+            builder.link(node, offset + left[i], offset + right[i], offset + missing)
+        builder.roots.append(offset)
+        builder.depth = max(builder.depth, depth.max())
+    return builder.build(base=base_score)
+
+
+def compile_model(model):
+    name = type(model).__name__
+    if name.startswith("CatBoost"):
+        compiled = export_catboost(model)
+    elif name.startswith("XGB"):
+        compiled = export_xgboost(model)
+    elif hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        compiled = export_sklearn_forest(model)
+    else:
+        compiled = None
+    if compiled is not None:
+        compiled.source = name
+        return compiled
+    if hasattr(model, "coef_"):
+        return CompiledLinear(np.asarray(model.coef_, dtype=np.float64), np.asarray(model.intercept_))
+    raise TypeError(f"Cannot compile {name}")
+
+
+def export_models(model_dir="models"):
+    """Compile every saved scope model to <name>.npz next to its joblib file."""
+    exported = {}
+    for name in ["best_scope1", "best_scope2", "best_joint"]:
+        path = f"{model_dir}/{name}.joblib"
+        if os.path.exists(path):
+            model = joblib.load(path)
+            compiled = compile_model(model)
+            compiled.save(f"{model_dir}/{name}.npz")
+            exported[name] = (model, compiled)
+    return exported
+
+
+def main():
+    from storage import read_table
+
+    feature_cols = joblib.load("models/feature_cols.joblib")
+    X = read_table("test_after_feature_engineering")[feature_cols]
+    for name, (model, compiled) in export_models().items():
+        diff = np.abs(np.asarray(model.predict(X)) - compiled.predict(X)).max()
+        print(f"{name}: {type(model).__name__} -> models/{name}.npz, max abs diff {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
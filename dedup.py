@@ -0,0 +1,30 @@
+"""
+Unique feature vectors for the imputers.
+
+merged_dataset has one row per activity x sector x SDG, so the same entity
+feature vector appears many times. In --dedup mode the imputers train on
+unique (features, label) pairs, predict once per unique feature vector and
+broadcast the predictions back to the rows with the inverse index.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def unique_rows(X, y=None):
+    """First-occurrence positions, inverse index and counts of the unique rows.
+
+    With y, rows are unique (features, label) pairs. Groups are numbered in
+    order of first appearance, so X[first] keeps the input order and
+    X[first][inverse] rebuilds X.
+    """
+    frame = pd.DataFrame(np.asarray(X))
+    if y is not None:
+        frame["label"] = np.asarray(y)
+    inverse = frame.groupby(list(frame.columns), sort=False, dropna=False).ngroup().to_numpy()
+    first = np.unique(inverse, return_index=True)[1]
+    return first, inverse, np.bincount(inverse)
+
+
+def report(name, n_rows, n_unique):
+    print(f"{name}: {n_rows} rows -> {n_unique} unique ({1 - n_unique / n_rows:.1%} fewer)")
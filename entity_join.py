@@ -0,0 +1,126 @@
+"""
+Entity-level joins of the 1:many supplementary tables.
+
+ChildTable keeps activities, SDGs and revenue-by-sector rows keyed by
+entity, so scoring.Scorer slices out only a batch's child rows and the
+activity x sector x SDG product stays bounded by the batch.
+build_entity_frame aggregates each table per entity before one join
+(merge_datasets.py --entity-level, benchmark_merge.py).
+
+The training stages still build the row-level outer merge. The imputers
+fit and predict per merged row: gb_env_imputation predicts a row's activity
+from its sector columns, and knn_sdg_imputation predicts its SDG from its
+activity columns. The fitted FeaturePipeline also counts and sums over those
+rows (num_activities, the sector revenue matrix). Moving training to entity
+rows would change every trained artifact.
+"""
+
+import numpy as np
+import pandas as pd
+
+ENTITY_KEY = "entity_id"
+
+
+class ChildTable:
+    """A 1:many table kept in entity order with row offsets per entity.
+
+    Rows for any set of entities can be sliced out without a merge, so the
+    exploded activity x sector x SDG product never has to be materialised.
+    """
+
+    def __init__(self, df, key=ENTITY_KEY):
+        self.key = key
+        self.df = df.sort_values(key, kind="stable").reset_index(drop=True)
+        keys = self.df[key].to_numpy()
+        self.entity_ids, self.starts, self.counts = np.unique(
+            keys, return_index=True, return_counts=True
+        )
+
+    def __len__(self):
+        return len(self.df)
+
+    def positions(self, entity_ids):
+        entity_ids = np.asarray(entity_ids)
+        loc = np.searchsorted(self.entity_ids, entity_ids)
+        loc = np.clip(loc, 0, max(len(self.entity_ids) - 1, 0))
+        found = (
+            self.entity_ids[loc] == entity_ids
+            if len(self.entity_ids)
+            else np.zeros(len(entity_ids), dtype=bool)
+        )
+        starts = self.starts[loc[found]]
+        counts = self.counts[loc[found]]
+        if len(counts) == 0:
+            return np.empty(0, dtype=np.int64)
+        # Expand (start, count) pairs into row positions without a Python loop
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(counts.sum())
+
+    def rows_for(self, entity_ids):
+        return self.df.iloc[self.positions(entity_ids)]
+
+    def entity_counts(self):
+        return pd.Series(self.counts, index=pd.Index(self.entity_ids, name=self.key))
+
+
+def aggregate_activities(env):
+    g = env.groupby(ENTITY_KEY)
+    agg = g.agg(
+        num_activities=("activity_code", "count"),
+        avg_env_score_adjustment=("env_score_adjustment", "mean"),
+    )
+    if "env_score_adjustment_capped" in env.columns:
+        agg["avg_env_score_adjustment_capped"] = g["env_score_adjustment_capped"].mean()
+    agg["has_activity"] = 1
+    return agg
+
+
+def aggregate_revenue(revenue):
+    g = revenue.groupby(ENTITY_KEY)
+    agg = g.agg(
+        num_sectors=("nace_level_2_code", "nunique"),
+        revenue_pct_total=("revenue_pct", "sum"),
+    )
+    # Dominant sector = the row with the largest revenue share per entity
+    top = revenue.sort_values([ENTITY_KEY, "revenue_pct"], ascending=[True, False])
+    top = top.drop_duplicates(ENTITY_KEY).set_index(ENTITY_KEY)
+    agg["nace_level_1_code"] = top["nace_level_1_code"]
+    agg["nace_level_2_code"] = top["nace_level_2_code"]
+    agg["top_sector_revenue_pct"] = top["revenue_pct"]
+    return agg
+
+
+def aggregate_sdgs(sdg, max_goals=3):
+    ordered = sdg.drop_duplicates([ENTITY_KEY, "sdg_id"])
+    rank = ordered.groupby(ENTITY_KEY).cumcount()
+    agg = ordered.groupby(ENTITY_KEY).agg(num_sdgs=("sdg_id", "count"))
+    first = ordered[rank < max_goals].assign(rank=rank[rank < max_goals] + 1)
+    wide = first.pivot(index=ENTITY_KEY, columns="rank", values="sdg_id")
+    for i in range(1, max_goals + 1):
+        agg[f"sdg_id_{i}"] = wide[i].astype("Int64") if i in wide.columns else pd.NA
+    agg["has_sdg"] = 1
+    return agg
+
+
+def build_entity_frame(entities, env, revenue, sdg):
+    """One row per entity: entity attributes plus aggregates of each child table.
+
+    Each 1:many table is reduced to entity level before joining, so the output
+    has exactly ``len(entities)`` rows and the joins are 1:1 index alignments.
+    """
+    base = entities.drop_duplicates(ENTITY_KEY).set_index(ENTITY_KEY)
+    wide = base.join(
+        [aggregate_activities(env), aggregate_revenue(revenue), aggregate_sdgs(sdg)],
+        how="left",
+    )
+    for col in ["num_activities", "has_activity", "num_sectors", "num_sdgs", "has_sdg"]:
+        wide[col] = wide[col].fillna(0).astype(int)
+    return wide.reset_index()
+
+
+def build_child_tables(env, revenue, sdg):
+    return {
+        "activities": ChildTable(env),
+        "revenue": ChildTable(revenue),
+        "sdgs": ChildTable(sdg),
+    }
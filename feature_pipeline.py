@@ -0,0 +1,282 @@
+"""
+Shared feature transforms for training and scoring.
+
+FeaturePipeline is fitted once on the merged training frame
+(the merged_dataset_complete checkpoint, one row per activity x sector x SDG) and
+persisted to models/feature_pipeline.joblib. Scoring then only applies the
+stored statistics: the sector PCA and ESG PCA are kept as plain arrays, so
+transform() is a handful of matrix multiplies and lookups.
+"""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from group_stats import COUNTRY_PROXY, COUNTRY_STATS, SECTOR_STATS, GroupTable
+
+PIPELINE_PATH = "models/feature_pipeline.joblib"
+TRAIN_CHECKPOINT = "merged_dataset_complete"
+
+ESG_PCA_COLS = ["environmental_score", "social_score", "governance_score", "revenue"]
+MAX_SECTOR_COMPONENTS = 10
+
+
+def fit_pca(X, n_components):
+    from sklearn.decomposition import PCA
+
+    pca = PCA(n_components=n_components, random_state=42)
+    pca.fit(X)
+    return pca.mean_, pca.components_
+
+
+def fit_standardized_pca_sparse(X, n_components):
+    """PCA of the standardized columns of a sparse matrix, without densifying it.
+
+    Equivalent to StandardScaler + PCA on X.toarray(): the covariance of the
+    standardized columns is built from the sparse Gram matrix X.T @ X, which
+    is only n_columns x n_columns. Component signs follow sklearn's PCA
+    (largest-magnitude score positive). Returns (mean, scale, components).
+    """
+    n = X.shape[0]
+    mean = np.asarray(X.mean(axis=0)).ravel()
+    sq_mean = np.asarray(X.multiply(X).mean(axis=0)).ravel()
+    std = np.sqrt(np.maximum(sq_mean - mean ** 2, 0.0))
+    scale = np.where(std == 0, 1.0, std)
+
+    gram = (X.T @ X).toarray() / n
+    cov = (gram - np.outer(mean, mean)) / np.outer(scale, scale)
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    components = eigvecs[:, np.argsort(eigvals)[::-1][:n_components]].T
+
+    scores = X @ (components / scale).T - (mean / scale) @ components.T
+    max_rows = np.argmax(np.abs(scores), axis=0)
+    signs = np.sign(scores[max_rows, np.arange(len(components))])
+    return mean, scale, components * signs[:, None]
+
+
+def sector_cells(df, entity_ids, sector_codes):
+    """(entity index, sector index, revenue_pct) of each known sector row."""
+    rows = df[df["nace_level_2_code"].notna()]
+    ent_idx = pd.Index(entity_ids).get_indexer(rows["entity_id"])
+    col_idx = sector_codes.get_indexer(rows["nace_level_2_code"])
+    known = (ent_idx >= 0) & (col_idx >= 0)
+    return ent_idx[known], col_idx[known], rows["revenue_pct"].fillna(0.0).values[known]
+
+
+def sector_matrix(df, entity_ids, sector_codes):
+    """Sparse entity x sector revenue_pct matrix (duplicate rows are summed)."""
+    from scipy import sparse
+
+    ent_idx, col_idx, values = sector_cells(df, entity_ids, sector_codes)
+    return sparse.csr_matrix(
+        (values, (ent_idx, col_idx)),
+        shape=(len(entity_ids), len(sector_codes)),
+    )
+
+
+def sector_product(df, entity_ids, sector_codes, weights):
+    """sector_matrix(df, ...) @ weights without scipy, for a scipy-free scoring import.
+
+    Adds up in the CSR product's order (duplicate cells, then each entity's
+    sectors in ascending order), so results match sector_matrix up to the
+    order scipy sums duplicate cells with different values in.
+    """
+    ent_idx, col_idx, values = sector_cells(df, entity_ids, sector_codes)
+    order = np.lexsort((col_idx, ent_idx))
+    ent_idx, col_idx, values = ent_idx[order], col_idx[order], values[order]
+    first = np.r_[True, (ent_idx[1:] != ent_idx[:-1]) | (col_idx[1:] != col_idx[:-1])][:len(values)]
+    # np.add.at accumulates sequentially, like scipy (reduceat sums pairwise)
+    cell_values = np.zeros(first.sum())
+    np.add.at(cell_values, np.cumsum(first) - 1, values)
+    out = np.zeros((len(entity_ids), weights.shape[1]))
+    np.add.at(out, ent_idx[first], cell_values[:, None] * weights[col_idx[first]])
+    return out
+
+
+def entity_base(df):
+    return df.sort_values("entity_id", kind="stable").drop_duplicates("entity_id")
+
+
+def env_aggregates(df, entity_ids):
+    env_rows = df[df["env_score_adjustment"].notna()]
+    env_agg = (
+        env_rows.groupby("entity_id", as_index=False)
+        .agg(
+            num_activities=("activity_code", "count"),
+            avg_env_score_adjustment=("env_score_adjustment", "mean"),
+        )
+    )
+    env_agg["has_activity"] = 1
+
+    env_agg_full = pd.DataFrame({"entity_id": entity_ids}).merge(env_agg, on="entity_id", how="left")
+    env_agg_full["num_activities"] = env_agg_full["num_activities"].fillna(0).astype(int)
+    env_agg_full["has_activity"] = env_agg_full["has_activity"].fillna(0).astype(int)
+    return env_agg_full
+
+
+def add_score_interactions(feat):
+    feat["revenue_x_environmental_score"] = feat["revenue"] * feat["environmental_score"]
+    feat["revenue_x_governance_score"] = feat["revenue"] * feat["governance_score"]
+    feat["E_x_S"] = feat["environmental_score"] * feat["social_score"]
+    feat["S_x_G"] = feat["social_score"] * feat["governance_score"]
+    return feat
+
+
+def add_model_interactions(feat):
+    feat["rev_x_env"] = feat["revenue"] * feat["environmental_score"]
+    feat["rev_x_gov"] = feat["revenue"] * feat["governance_score"]
+    feat["env_x_gov"] = feat["environmental_score"] * feat["governance_score"]
+    feat["esg_sum"] = feat["environmental_score"] + feat["social_score"] + feat["governance_score"]
+    if "Sector_Comp_1" in feat.columns and "country_ts2_per_revenue" in feat.columns:
+        feat["sector1_x_country"] = feat["Sector_Comp_1"] * feat["country_ts2_per_revenue"]
+    return feat
+
+
+def proxy_rows(df):
+    return pd.DataFrame({
+        "country_code": df["country_code"],
+        "ts2_per_revenue": df["target_scope_2"] / df["revenue"],
+    })
+
+
+def labelled_entities(df):
+    base = entity_base(df)
+    return base.assign(target_scope_2_log=np.log1p(base["target_scope_2"]))
+
+
+class FeaturePipeline:
+    def fit(self, train):
+        base = entity_base(train)
+
+        # Sector exposure: sparse entity x nace_level_2_code revenue matrix ->
+        # standardized PCA, over the entities with at least one sector row
+        sector_rows = train[train["nace_level_2_code"].notna()]
+        self.sector_codes = pd.Index(np.sort(sector_rows["nace_level_2_code"].unique()))
+        rev_matrix = sector_matrix(train, np.sort(sector_rows["entity_id"].unique()), self.sector_codes)
+        self.n_sector_components = min(MAX_SECTOR_COMPONENTS, *rev_matrix.shape)
+        self.rev_mean, self.rev_scale, self.sector_pca_components = fit_standardized_pca_sparse(
+            rev_matrix, self.n_sector_components
+        )
+        self.sector_pca_mean = np.zeros(len(self.sector_codes))
+
+        self.esg_pca_mean, self.esg_pca_components = fit_pca(base[ESG_PCA_COLS].fillna(0).values, 2)
+
+        self.fit_group_stats(train)
+
+        # Fill values: training medians for raw columns, and medians of the
+        # transformed training entities for derived ones, so scoring a batch
+        # never depends on the other rows in that batch.
+        self.fill_values = {}
+        feat = self.transform(train, fill=False)
+        for col in feat.select_dtypes(include=[np.number]).columns:
+            source = base if col in base.columns else feat
+            value = source[col].median()
+            self.fill_values[col] = 0 if pd.isna(value) else value
+        return self
+
+    def fit_group_stats(self, train):
+        """Lookup tables used by training_model.py and at scoring time.
+
+        The revenue proxy is over the merged rows, the sector/country
+        encodings over the training entities.
+        """
+        self.country_proxy = GroupTable("country_code", COUNTRY_PROXY).fit(proxy_rows(train))
+        entities = labelled_entities(train)
+        self.sector_stats = GroupTable("nace_level_2_code", SECTOR_STATS).fit(entities)
+        self.country_stats = GroupTable("country_code", COUNTRY_STATS).fit(entities)
+        return self
+
+    def update_group_stats(self, labelled):
+        """Fold newly labelled entities (merged rows, as for fit) into the lookup tables.
+
+        The PCA projections and fill values stay as fitted.
+        """
+        self.country_proxy.update(proxy_rows(labelled))
+        entities = labelled_entities(labelled)
+        self.sector_stats.update(entities)
+        self.country_stats.update(entities)
+        return self
+
+    def add_group_stats(self, feat):
+        feat[self.sector_stats.columns] = self.sector_stats.lookup(feat["nace_level_2_code"])
+        feat[self.country_stats.columns] = self.country_stats.lookup(feat["country_code"])
+        return feat
+
+    def sector_components(self, df, entity_ids):
+        rows = df[df["nace_level_2_code"].notna() & df["revenue_pct"].notna()]
+
+        # ((X - rev_mean) / rev_scale - pca_mean) @ C.T, with the scaling and
+        # centring folded into the projection so X stays sparse
+        weights = (self.sector_pca_components / self.rev_scale).T
+        offset = (self.rev_mean / self.rev_scale + self.sector_pca_mean) @ self.sector_pca_components.T
+        comps = sector_product(rows, entity_ids, self.sector_codes, weights) - offset
+
+        # Entities without any revenue rows have no sector exposure at all
+        has_revenue = np.zeros(len(entity_ids), dtype=bool)
+        has_revenue[pd.Index(entity_ids).get_indexer(rows["entity_id"])] = True
+        comps[~has_revenue] = np.nan
+        return pd.DataFrame(
+            comps,
+            columns=[f"Sector_Comp_{i+1}" for i in range(self.n_sector_components)],
+        )
+
+    def esg_components(self, feat):
+        esg = (feat[ESG_PCA_COLS].fillna(0).values - self.esg_pca_mean) @ self.esg_pca_components.T
+        return esg[:, 0], esg[:, 1]
+
+    def entity_features(self, df):
+        base = entity_base(df).reset_index(drop=True)
+        entity_ids = base["entity_id"].values
+
+        feat = pd.concat([base, self.sector_components(df, entity_ids)], axis=1)
+        feat = feat.merge(env_aggregates(df, entity_ids), on="entity_id", how="left")
+        return feat
+
+    def transform(self, batch, fill=True):
+        feat = self.entity_features(batch)
+
+        feat["revenue_log"] = np.log1p(feat["revenue"])
+        feat["env_score_adjustment_capped"] = feat["avg_env_score_adjustment"].clip(-1.0, 1.0)
+
+        feat = add_score_interactions(feat)
+        feat["country_ts2_per_revenue"] = self.country_proxy.lookup(feat["country_code"])[:, 0]
+        feat = self.add_group_stats(feat)
+
+        feat = add_model_interactions(feat)
+        feat["ESG_Comp_1"], feat["ESG_Comp_2"] = self.esg_components(feat)
+
+        if fill:
+            feat = self.fill_missing(feat)
+        return feat
+
+    def fill_missing(self, feat):
+        for col in feat.select_dtypes(include=[np.number]).columns:
+            if feat[col].isnull().any():
+                if col in self.fill_values:
+                    fill_value = self.fill_values[col]
+                else:
+                    fill_value = feat[col].median()
+                if pd.isna(fill_value):
+                    fill_value = 0
+                feat[col] = feat[col].fillna(fill_value)
+        return feat
+
+    def save(self, path=PIPELINE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=PIPELINE_PATH):
+        return joblib.load(path)
+
+
+def load_or_fit_pipeline(path=PIPELINE_PATH, train_checkpoint=TRAIN_CHECKPOINT):
+    if os.path.exists(path):
+        return FeaturePipeline.load(path)
+    from storage import read_table
+
+    pipeline = FeaturePipeline().fit(read_table(train_checkpoint))
+    pipeline.save(path)
+    return pipeline
@@ -0,0 +1,136 @@
+"""
+Cross-validation splits and per-fold matrices shared by the imputers and
+training_model.py.
+
+A FoldCache converts its feature matrix to one C-contiguous float64 array
+and computes the split indices once. Splits are saved under .fold_cache/
+keyed by the name and a fingerprint of the row count, the labels (when
+stratified) and the split settings, so every script and run that asks for
+the same split gets the same indices. Per-fold train/validation matrices
+are materialized once on first use and then handed to every estimator and
+search candidate without another DataFrame -> ndarray gather. With
+mmap=True (or FOLD_CACHE_MMAP=1) they are written as .npy files and opened
+memory-mapped read-only, so process pools share them through the page
+cache. cache_dir=None keeps everything in memory.
+
+Splits are the ones sklearn would produce: KFold/StratifiedKFold for the
+folds and train_test_split for holdout().
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
+
+CACHE_DIR = ".fold_cache"
+
+
+def fingerprint(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(np.ascontiguousarray(part).tobytes())
+            h.update(str(part.dtype).encode())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def _label_array(y):
+    y = np.asarray(y)
+    # Object labels (activity_type strings) hash by value, not by pointer
+    return y.astype(str).astype("U") if y.dtype == object else y
+
+
+def _cached_indices(name, key, compute, cache_dir):
+    if cache_dir is None:
+        return compute()
+    path = os.path.join(cache_dir, f"{name}-{key}.npz")
+    if os.path.exists(path):
+        with np.load(path) as saved:
+            arrays = [saved[f"arr_{i}"] for i in range(len(saved.files))]
+        return [tuple(arrays[i:i + 2]) for i in range(0, len(arrays), 2)]
+    splits = compute()
+    _atomic_save(path, lambda f: np.savez(f, *[a for pair in splits for a in pair]))
+    return splits
+
+
+def _atomic_save(path, write):
+    # Scripts run in parallel by pipeline_runner.py may share the cache
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class FoldCache:
+    def __init__(self, name, X, y=None, n_splits=5, stratify=False, shuffle=True,
+                 random_state=42, mmap=None, cache_dir=CACHE_DIR):
+        self.name = name
+        self.X = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+        self.y = None if y is None else np.asarray(y)
+        self.cache_dir = cache_dir
+        self.mmap = os.environ.get("FOLD_CACHE_MMAP") == "1" if mmap is None else mmap
+        self.mmap = self.mmap and cache_dir is not None
+        self.random_state = random_state if shuffle else None
+        self._arrays = {}
+        self._matrix_key = None
+
+        labels = _label_array(self.y) if stratify else None
+        settings = {"n": len(self.X), "n_splits": n_splits, "stratify": stratify,
+                    "shuffle": shuffle, "random_state": self.random_state}
+        key = self._split_key = fingerprint(settings, labels if labels is not None else "")
+
+        def compute():
+            if stratify:
+                cv = StratifiedKFold(n_splits=n_splits, shuffle=shuffle, random_state=self.random_state)
+            else:
+                cv = KFold(n_splits=n_splits, shuffle=shuffle, random_state=self.random_state)
+            return list(cv.split(self.X, labels))
+
+        self.splits = _cached_indices(name, key, compute, cache_dir)
+
+    def __len__(self):
+        return len(self.splits)
+
+    def fold(self, i):
+        """(X_train, X_val) of fold i as contiguous (or memory-mapped) arrays."""
+        if i not in self._arrays:
+            train_idx, val_idx = self.splits[i]
+            self._arrays[i] = (self._materialize(i, "train", train_idx),
+                               self._materialize(i, "val", val_idx))
+        return self._arrays[i]
+
+    def __iter__(self):
+        """Yields (train_idx, val_idx, X_train, X_val) for every fold."""
+        for i, (train_idx, val_idx) in enumerate(self.splits):
+            yield (train_idx, val_idx) + self.fold(i)
+
+    def holdout(self, test_size, stratify=False, random_state=42):
+        """(train_idx, test_idx) as train_test_split(..., shuffle=True) would split the rows."""
+        labels = _label_array(self.y) if stratify else None
+        settings = {"n": len(self.X), "test_size": test_size, "stratify": stratify,
+                    "random_state": random_state}
+        key = fingerprint(settings, labels if labels is not None else "")
+
+        def compute():
+            return [tuple(train_test_split(
+                np.arange(len(self.X)), test_size=test_size, random_state=random_state, stratify=labels
+            ))]
+
+        return _cached_indices(f"{self.name}-holdout", key, compute, self.cache_dir)[0]
+
+    def _materialize(self, i, part, idx):
+        if not self.mmap:
+            return np.take(self.X, idx, axis=0)
+        # Keyed by the matrix contents too: the same split may be used with
+        # differently encoded features
+        if self._matrix_key is None:
+            self._matrix_key = fingerprint(self._split_key, self.X)
+        path = os.path.join(self.cache_dir, f"{self.name}-{self._matrix_key}", f"fold{i}_{part}.npy")
+        if not os.path.exists(path):
+            _atomic_save(path, lambda f: np.save(f, np.take(self.X, idx, axis=0)))
+        return np.load(path, mmap_mode="r")
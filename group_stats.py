@@ -0,0 +1,125 @@
+"""
+Group-statistics lookup tables for the country and sector encodings.
+
+A GroupTable maps one key column (country_code, nace_level_2_code) to a few
+per-group statistics. Keys get dense integer codes, sorted at fit time and
+appended by update(), so existing codes never move. The statistics live in
+one float64 array with a trailing all-NaN row: applying a table is a code
+lookup plus a row gather, and unknown or missing keys (code -1) land on the
+NaN row.
+
+Means are kept as per-group sums and counts and medians as each group's
+values sorted in one flat array (CSR-style offsets), so update() with
+newly labelled rows gives the statistics a refit on old + new rows would,
+without revisiting the old rows. fit() sets version 1; each update() bumps
+it.
+"""
+
+import numpy as np
+import pandas as pd
+
+# (output column, aggregate, source column(s)); "ratio" is mean(a) / mean(b)
+SECTOR_STATS = [
+    ("sector_avg_scope2_log", "mean", "target_scope_2_log"),
+    ("sector_median_scope2_log", "median", "target_scope_2_log"),
+]
+COUNTRY_STATS = [
+    ("country_avg_scope2_log", "mean", "target_scope_2_log"),
+    ("country_avg_scope2_per_revenue", "ratio", ("target_scope_2", "revenue")),
+    ("country_avg_esg", "mean", "environmental_score"),
+]
+COUNTRY_PROXY = [("country_ts2_per_revenue", "mean", "ts2_per_revenue")]
+
+
+class GroupTable:
+    def __init__(self, key, stats):
+        self.key = key
+        self.stats = stats
+        self.columns = [name for name, _, _ in stats]
+        self.version = 0
+        self.keys = pd.Index([])
+        self.mean_sources = sorted({
+            col for _, agg, source in stats if agg != "median"
+            for col in (source if agg == "ratio" else (source,))
+        })
+        self.median_sources = sorted({source for _, agg, source in stats if agg == "median"})
+        self.sums = {col: np.zeros(0) for col in self.mean_sources}
+        self.counts = {col: np.zeros(0, dtype=np.int64) for col in self.mean_sources}
+        self.sorted_values = {col: np.zeros(0) for col in self.median_sources}
+        self.offsets = {col: np.zeros(1, dtype=np.int64) for col in self.median_sources}
+        self.table = np.full((1, len(stats)), np.nan)
+
+    def fit(self, df):
+        self.__init__(self.key, self.stats)
+        return self.update(df)
+
+    def update(self, df):
+        """Fold the rows of df into the statistics; returns self."""
+        rows = df[df[self.key].notna()]
+        new_keys = pd.Index(rows[self.key].unique()).difference(self.keys)
+        self.keys = new_keys if len(self.keys) == 0 else self.keys.append(new_keys)
+        codes = self.keys.get_indexer(rows[self.key])
+        n_groups = len(self.keys)
+
+        for col in self.mean_sources:
+            values = rows[col].to_numpy(dtype=np.float64)
+            known = ~np.isnan(values)
+            sums = np.pad(self.sums[col], (0, n_groups - len(self.sums[col])))
+            # groupby sum for pandas' compensated summation, as groupby().mean() uses
+            group_sums = pd.Series(values[known]).groupby(codes[known]).sum()
+            sums[group_sums.index] += group_sums.to_numpy()
+            self.sums[col] = sums
+            self.counts[col] = np.pad(self.counts[col], (0, n_groups - len(self.counts[col]))) \
+                + np.bincount(codes[known], minlength=n_groups)
+
+        for col in self.median_sources:
+            values = rows[col].to_numpy(dtype=np.float64)
+            known = ~np.isnan(values)
+            old_counts = np.diff(self.offsets[col])
+            all_codes = np.concatenate([np.repeat(np.arange(len(old_counts)), old_counts), codes[known]])
+            all_values = np.concatenate([self.sorted_values[col], values[known]])
+            order = np.lexsort((all_values, all_codes))
+            self.sorted_values[col] = all_values[order]
+            self.offsets[col] = np.concatenate([[0], np.cumsum(np.bincount(all_codes, minlength=n_groups))])
+
+        self.table = np.vstack([self.compute(), np.full((1, len(self.stats)), np.nan)])
+        self.version += 1
+        return self
+
+    def mean(self, col):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts[col] > 0, self.sums[col] / self.counts[col], np.nan)
+
+    def median(self, col):
+        values, offsets = self.sorted_values[col], self.offsets[col]
+        counts = np.diff(offsets)
+        present = counts > 0
+        lo = offsets[:-1][present] + (counts[present] - 1) // 2
+        hi = offsets[:-1][present] + counts[present] // 2
+        out = np.full(len(counts), np.nan)
+        out[present] = (values[lo] + values[hi]) / 2
+        return out
+
+    def compute(self):
+        out = np.empty((len(self.keys), len(self.stats)))
+        for i, (_, agg, source) in enumerate(self.stats):
+            if agg == "mean":
+                out[:, i] = self.mean(source)
+            elif agg == "median":
+                out[:, i] = self.median(source)
+            else:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    out[:, i] = self.mean(source[0]) / self.mean(source[1])
+        return out
+
+    def codes(self, keys):
+        """Dense code of each key, -1 for unknown or missing keys."""
+        return self.keys.get_indexer(keys)
+
+    def lookup(self, keys):
+        """len(keys) x len(columns) statistics; NaN rows for unknown keys."""
+        # np.take is several times faster than fancy indexing on a small 2-D table
+        return np.take(self.table, self.codes(keys), axis=0)
+
+    def to_frame(self):
+        return pd.DataFrame(self.table[:-1], index=pd.Index(self.keys, name=self.key), columns=self.columns)
@@ -0,0 +1,160 @@
+"""
+Budget-aware successive-halving search for training_model.py.
+
+Candidates are sampled like RandomizedSearchCV, all evaluated with a small
+budget of a resource (trees for RandomForest, boosting rounds for
+XGBoost/CatBoost, training rows for anything else), and only the best
+1/factor advance to the next rung with factor times the budget. Boosting
+models also stop natively (early_stopping_rounds) on the last
+EARLY_STOPPING_FRACTION of each training fold, so the validation fold that
+scores them stays unseen, and the final refit uses the number of rounds early
+stopping settled on.
+
+cv is a fold count or a FoldCache (fold_cache.py); either way the fold
+matrices are gathered once and reused by every candidate and rung.
+
+Every evaluation is logged with its cumulative fit time, so history gives a
+time-to-best-score curve comparable with the random search's.
+"""
+
+import math
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import ParameterSampler
+
+from fold_cache import FoldCache
+
+EARLY_STOPPING_FRACTION = 0.2
+
+
+class HalvingResult:
+    def __init__(self, best_estimator, best_params, best_score, history, fit_time):
+        self.best_estimator_ = best_estimator
+        self.best_params_ = best_params
+        self.best_score_ = best_score
+        self.history = history
+        self.fit_time = fit_time
+
+
+def _is_catboost(estimator):
+    return type(estimator).__name__.startswith("CatBoost")
+
+
+def _fit_fold(estimator, X_tr, y_tr, X_va, y_va, early_stopping_rounds):
+    """Fit one fold; returns (val score, boosting rounds actually used)."""
+    rounds = None
+    if early_stopping_rounds:
+        # Early stopping watches the tail of the training fold, not X_va
+        n_fit = len(y_tr) - max(1, int(len(y_tr) * EARLY_STOPPING_FRACTION))
+        X_tr, X_es, y_tr, y_es = X_tr[:n_fit], X_tr[n_fit:], y_tr[:n_fit], y_tr[n_fit:]
+        estimator.set_params(early_stopping_rounds=early_stopping_rounds)
+    if early_stopping_rounds and _is_catboost(estimator):
+        estimator.fit(X_tr, y_tr, eval_set=(X_es, y_es))
+        rounds = estimator.get_best_iteration() + 1
+    elif early_stopping_rounds:
+        estimator.fit(X_tr, y_tr, eval_set=[(X_es, y_es)], verbose=False)
+        rounds = estimator.best_iteration + 1
+    else:
+        estimator.fit(X_tr, y_tr)
+    return -mean_squared_error(y_va, estimator.predict(X_va)), rounds
+
+
+def halving_search(
+    estimator,
+    param_dist,
+    X,
+    y,
+    resource="n_samples",
+    max_resource=None,
+    min_resource=None,
+    n_candidates=20,
+    factor=3,
+    cv=3,
+    early_stopping_rounds=None,
+    random_state=42,
+):
+    start = time.perf_counter()
+    if not isinstance(cv, FoldCache):
+        # Unshuffled KFold, as RandomizedSearchCV(cv=int) splits
+        cv = FoldCache("halving", X, n_splits=cv, shuffle=False, cache_dir=None)
+    folds = list(cv)
+    y_values = np.asarray(y)
+    # resource=None evaluates every candidate on all rows, for models too cheap
+    # (or too sample-hungry) to halve
+    halve = resource is not None
+    resource = resource or "n_samples"
+    if max_resource is None:
+        max_resource = max(len(tr) for tr, *_ in folds) if resource == "n_samples" else 1000
+
+    # The resource is controlled by the search, not sampled from the grid
+    dist = {k: v for k, v in param_dist.items() if k != resource}
+    candidates = list(ParameterSampler(dist, n_iter=n_candidates, random_state=random_state))
+    n_rungs = max(1, math.ceil(math.log(len(candidates), factor)) + 1) if halve else 1
+    budget = min_resource or max(1, int(max_resource / factor ** (n_rungs - 1)))
+
+    history = []
+    best_score = -np.inf
+    rung = 0
+    while True:
+        scores, rounds = [], []
+        for params in candidates:
+            fold_scores, fold_rounds = [], []
+            for tr, va, X_tr, X_va in folds:
+                est = clone(estimator).set_params(**params)
+                if resource == "n_samples":
+                    tr, X_tr = tr[:budget], X_tr[:budget]
+                else:
+                    est.set_params(**{resource: budget})
+                score, used = _fit_fold(
+                    est, X_tr, y_values[tr], X_va, y_values[va], early_stopping_rounds
+                )
+                fold_scores.append(score)
+                fold_rounds.append(used)
+            scores.append(np.mean(fold_scores))
+            rounds.append(fold_rounds)
+            # Only scores at the full budget are comparable with a full search
+            if budget >= max_resource:
+                best_score = max(best_score, scores[-1])
+            history.append({
+                "elapsed_s": time.perf_counter() - start,
+                "rung": rung,
+                "budget": budget,
+                "score": scores[-1],
+                "best_score": best_score,
+            })
+
+        order = np.argsort(scores)[::-1]
+        if len(candidates) == 1 or budget >= max_resource:
+            break
+        keep = order[: max(1, math.ceil(len(candidates) / factor))]
+        candidates = [candidates[i] for i in keep]
+        rung += 1
+        # Follow the planned schedule; the last rung always gets the full
+        # budget, even if rounding fell short
+        budget = max_resource if rung >= n_rungs - 1 else min(budget * factor, max_resource)
+
+    best = int(order[0])
+    best_params = dict(candidates[best])
+    if resource != "n_samples":
+        used = [r for r in rounds[best] if r is not None]
+        best_params[resource] = int(round(np.mean(used))) if used else budget
+
+    best_estimator = clone(estimator).set_params(**best_params).fit(X, y)
+    return HalvingResult(
+        best_estimator, best_params, scores[best], history, time.perf_counter() - start
+    )
+
+
+def random_search_curve(search):
+    """Time-to-best-score curve from a fitted RandomizedSearchCV, same columns as history."""
+    res = search.cv_results_
+    n_splits = search.n_splits_
+    per_candidate = (np.asarray(res["mean_fit_time"]) + np.asarray(res["mean_score_time"])) * n_splits
+    scores = np.asarray(res["mean_test_score"])
+    return [
+        {"elapsed_s": t, "rung": 0, "budget": None, "score": s, "best_score": b}
+        for t, s, b in zip(np.cumsum(per_candidate), scores, np.maximum.accumulate(scores))
+    ]
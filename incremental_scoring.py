@@ -0,0 +1,138 @@
+"""
+Incremental re-scoring: only entities whose inputs changed are re-predicted.
+
+Every entity gets a 64-bit fingerprint of its rows in the four source
+tables (test.csv, activities, SDGs, revenue split), order-sensitive within
+an entity since the first merged row is the one scoring keeps. Fingerprints
+are stored in .scoring_cache/ together with a hash of the scoring code,
+models and fitted pipeline. A re-run re-engineers and re-predicts new and
+changed entities only, drops removed ones, and merges the result into the
+previous predictions file. Any change to code or models rescores everything;
+a run with nothing changed or removed leaves the predictions file untouched.
+Re-scored rows match a full run up to float rounding, as with chunked scoring.
+
+    python run_test_predictions.py --incremental
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from code_hash import ROOT, hash_file, local_modules
+from entity_join import ENTITY_KEY, ChildTable
+from storage import read_table, write_table
+
+CACHE_DIR = ".scoring_cache"
+# Mixes a row's position within its entity into the row hash
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def table_hashes(table):
+    """(entity_ids, one uint64 per entity) for a ChildTable; row order matters."""
+    if len(table) == 0:
+        return table.entity_ids, np.empty(0, dtype=np.uint64)
+    row_hash = pd.util.hash_pandas_object(table.df, index=False).to_numpy()
+    rank = (np.arange(len(table)) - np.repeat(table.starts, table.counts)).astype(np.uint64)
+    mixed = pd.util.hash_array(row_hash ^ (rank * GOLDEN))
+    # uint64 sums wrap, which is what a hash combine wants
+    return table.entity_ids, np.add.reduceat(mixed, table.starts)
+
+
+def entity_fingerprints(entity_ids, tables):
+    entity_ids = np.asarray(entity_ids)
+    fp = np.zeros(len(entity_ids), dtype=np.uint64)
+    for salt, table in enumerate(tables, start=1):
+        ids, hashes = table_hashes(table)
+        loc = pd.Index(ids).get_indexer(entity_ids)
+        found = loc >= 0
+        fp[found] += pd.util.hash_array(hashes[loc[found]] ^ np.uint64(salt))
+    return pd.Series(fp, index=pd.Index(entity_ids, name=ENTITY_KEY), name="fingerprint")
+
+
+def scoring_fingerprint(model_dir="models", compiled=False):
+    """Hash of the scoring code (scoring.py and its local imports), models and pipeline."""
+    import hashlib
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"compiled": compiled}).encode())
+    for module in sorted(local_modules("scoring.py")):
+        digest.update(module.encode())
+        hash_file(os.path.join(ROOT, module), digest)
+    for name in sorted(os.listdir(model_dir)):
+        digest.update(name.encode())
+        hash_file(os.path.join(model_dir, name), digest)
+    return digest.hexdigest()
+
+
+def load_state(cache_dir=CACHE_DIR):
+    path = os.path.join(cache_dir, "state.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def rescore(scorer, entities_path="data/test.csv", out_path="data/test_predictions.csv",
+            model_dir="models", compiled=False, cache_dir=CACHE_DIR):
+    """Re-predict changed entities and merge them into out_path; returns a summary dict."""
+    start = time.perf_counter()
+    entities = pd.read_csv(entities_path)
+    entities = entities[entities[ENTITY_KEY].notna()]
+    children = scorer.children
+    fingerprints = entity_fingerprints(
+        entities[ENTITY_KEY].unique(),
+        [ChildTable(entities), children["activities"], children["sdgs"], children["revenue"]],
+    )
+
+    state = load_state(cache_dir)
+    scoring_hash = scoring_fingerprint(model_dir, compiled)
+    stored = None
+    if state.get("scoring") == scoring_hash and state.get("predictions") == out_path and os.path.exists(out_path):
+        try:
+            stored = read_table("entity_fingerprints", data_dir=cache_dir)
+        except FileNotFoundError:
+            # state.json without its fingerprint store: rescore everything
+            stored = None
+
+    if stored is None:
+        changed, removed = fingerprints.index, 0
+        kept = pd.DataFrame(columns=[ENTITY_KEY])
+    else:
+        loc = pd.Index(stored[ENTITY_KEY]).get_indexer(fingerprints.index)
+        old = stored["fingerprint"].to_numpy(dtype=np.int64).view(np.uint64)
+        same = loc >= 0
+        same[same] = old[loc[same]] == fingerprints.to_numpy()[same]
+        changed = fingerprints.index[~same]
+        removed = int((~stored[ENTITY_KEY].isin(fingerprints.index)).sum())
+
+    summary = {"entities": len(fingerprints), "rescored": len(changed), "removed": removed,
+               "full": stored is None}
+    if stored is not None and len(changed) == 0 and removed == 0:
+        summary["seconds"] = time.perf_counter() - start
+        return summary
+
+    if stored is not None:
+        # round_trip: kept rows are written back bit-for-bit. Unchanged
+        # entities keep their previous rows; removed ones drop out
+        previous = pd.read_csv(out_path, float_precision="round_trip")
+        kept = previous[previous[ENTITY_KEY].isin(fingerprints.index[same])]
+
+    fresh = scorer.predict(entities[entities[ENTITY_KEY].isin(changed)]) if len(changed) else None
+    out = pd.concat([kept, fresh], ignore_index=True) if fresh is not None else kept
+    out = out.sort_values(ENTITY_KEY, kind="stable").reset_index(drop=True)
+
+    tmp_path = out_path + ".tmp"
+    out.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, out_path)
+    # Stored as int64 so every storage format round-trips it exactly
+    os.makedirs(cache_dir, exist_ok=True)
+    stored = pd.DataFrame({ENTITY_KEY: fingerprints.index, "fingerprint": fingerprints.to_numpy().view(np.int64)})
+    write_table(stored, "entity_fingerprints", data_dir=cache_dir)
+    with open(os.path.join(cache_dir, "state.json"), "w") as f:
+        json.dump({"scoring": scoring_hash, "predictions": out_path}, f, indent=2)
+
+    summary["seconds"] = time.perf_counter() - start
+    return summary
@@ -0,0 +1,255 @@
+"""
+Stage, model fit and predict instrumentation for the pipeline.
+
+A span records wall time, CPU time (own and reaped child processes), peak
+RSS (psutil, sampled every SAMPLE_INTERVAL while any span is open), rows
+in/out and bytes read/written (process I/O counters). Recording is off
+unless PIPELINE_PROFILE names a JSON-lines file; each closed span is then
+appended to it as one line, so stages and worker processes can share the
+file. Spans nest; storage.read_table/write_table and schema.read_source add
+the rows they move to every open span.
+
+    with span("fit", "CatBoost/target_scope_1_log", rows_in=len(X)):
+        model.fit(X, y)
+
+    PIPELINE_PROFILE=logs/profile.jsonl python instrumentation.py run feature_engineering.py
+    python instrumentation.py summary logs/profile.jsonl        # latest run
+    python pipeline_runner.py --profile                         # every stage, then the summary
+"""
+
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+PROFILE_ENV = "PIPELINE_PROFILE"
+RUN_ENV = "PIPELINE_RUN_ID"
+DEFAULT_PATH = "logs/profile.jsonl"
+SAMPLE_INTERVAL = 0.01
+
+_process = None
+_local = threading.local()
+_open_spans = set()
+_lock = threading.Lock()
+_sampler = None
+
+
+def profile_path():
+    return os.environ.get(PROFILE_ENV) or None
+
+
+def run_id():
+    # Set by pipeline_runner.py so every stage of one run shares the id
+    if RUN_ENV not in os.environ:
+        os.environ[RUN_ENV] = uuid.uuid4().hex[:12]
+    return os.environ[RUN_ENV]
+
+
+def _proc():
+    # psutil is only imported once a span records, so importing this module
+    # (storage, scoring) costs nothing when profiling is off
+    global _process
+    if _process is None:
+        import psutil
+        _process = psutil.Process()
+    return _process
+
+
+def _rss():
+    return _proc().memory_info().rss
+
+
+def _io():
+    # psutil has no per-process I/O counters on macOS
+    if not hasattr(_proc(), "io_counters"):
+        return None
+    counters = _proc().io_counters()
+    # read_chars/write_chars (Linux) include page-cache hits, as pandas reads mostly are
+    return (getattr(counters, "read_chars", counters.read_bytes),
+            getattr(counters, "write_chars", counters.write_bytes))
+
+
+def _child_cpu():
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil's children fields (zero there, like unreaped children)
+        times = _proc().cpu_times()
+        return times.children_user + times.children_system
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _sample():
+    while True:
+        with _lock:
+            if not _open_spans:
+                globals()["_sampler"] = None
+                return
+            rss = _rss()
+            for s in _open_spans:
+                s.peak_rss = max(s.peak_rss, rss)
+        time.sleep(SAMPLE_INTERVAL)
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+class Span:
+    """Measure a with-block; set .rows_out (or add_rows) on the span inside it."""
+
+    def __init__(self, kind, name, rows_in=None, rows_out=None, path=None, **fields):
+        self.kind = kind
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = rows_out
+        self.path = path or profile_path()
+        self.fields = fields
+
+    def add_rows(self, read=0, written=0):
+        if read:
+            self.rows_in = (self.rows_in or 0) + read
+        if written:
+            self.rows_out = (self.rows_out or 0) + written
+
+    def __enter__(self):
+        global _sampler
+        if self.path is None:
+            return self
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.child_cpu = _child_cpu()
+        self.io = _io()
+        self.rss = self.peak_rss = _rss()
+        stack.append(self)
+        with _lock:
+            _open_spans.add(self)
+            if _sampler is None:
+                _sampler = threading.Thread(target=_sample, daemon=True)
+                _sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.path is None:
+            return False
+        with _lock:
+            _open_spans.discard(self)
+        _stack().remove(self)
+        failed = exc_type is not None and not (exc_type is SystemExit and not exc.code)
+        write_record(self.record("error" if failed else "ok"), self.path)
+        return False
+
+    def record(self, status):
+        io = _io()
+        rss = _rss()
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "run": run_id(),
+            "pid": os.getpid(),
+            "kind": self.kind,
+            "name": self.name,
+            "parent": self.parent,
+            "status": status,
+            "wall_s": time.perf_counter() - self.wall,
+            "cpu_s": time.process_time() - self.cpu,
+            "child_cpu_s": _child_cpu() - self.child_cpu,
+            "rss_start_mb": self.rss / 1e6,
+            "rss_end_mb": rss / 1e6,
+            "peak_rss_mb": max(self.peak_rss, rss) / 1e6,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "bytes_read": io[0] - self.io[0] if io else None,
+            "bytes_written": io[1] - self.io[1] if io else None,
+            **self.fields,
+        }
+
+
+span = Span
+
+
+def add_rows(read=0, written=0):
+    """Attribute rows read/written to every span open on this thread."""
+    for s in _stack():
+        s.add_rows(read, written)
+
+
+def write_record(record, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # One write per line on an O_APPEND file keeps concurrent writers' lines whole
+    with open(path, "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+def load_records(path, run=None):
+    import pandas as pd
+
+    records = pd.read_json(path, lines=True)
+    if run == "last":
+        run = records["run"].iloc[-1]
+    return records if run is None else records[records["run"] == run]
+
+
+def summary(path, run="last"):
+    """Per (kind, name): calls, total wall/CPU, max peak RSS, rows and bytes."""
+    records = load_records(path, run)
+    table = records.groupby(["kind", "name"], sort=False).agg(
+        calls=("wall_s", "size"),
+        wall_s=("wall_s", "sum"),
+        cpu_s=("cpu_s", "sum"),
+        child_cpu_s=("child_cpu_s", "sum"),
+        peak_rss_mb=("peak_rss_mb", "max"),
+        rows_in=("rows_in", "sum"),
+        rows_out=("rows_out", "sum"),
+        mb_read=("bytes_read", lambda b: b.sum() / 1e6),
+        mb_written=("bytes_written", lambda b: b.sum() / 1e6),
+    )
+    return table.sort_values("wall_s", ascending=False).reset_index()
+
+
+def print_summary(path, run="last"):
+    table = summary(path, run)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+
+
+def run_script(argv, path):
+    """Run a pipeline script as __main__ inside one "stage" span."""
+    script = argv[0]
+    sys.argv = list(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    name = " ".join([os.path.splitext(os.path.basename(script))[0]] + argv[1:])
+    with span("stage", name, path=path):
+        runpy.run_path(script, run_name="__main__")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run")
+    run_parser.add_argument("script", nargs=argparse.REMAINDER)
+    summary_parser = sub.add_parser("summary")
+    summary_parser.add_argument("path", nargs="?", default=None)
+    summary_parser.add_argument("--run", default="last", help="run id, 'last' or 'all'")
+    args = parser.parse_args()
+
+    path = profile_path() or DEFAULT_PATH
+    if args.command == "run":
+        os.environ[PROFILE_ENV] = path
+        # The span stack storage.py credits rows to lives in the imported module, not __main__
+        import instrumentation
+        instrumentation.run_script(args.script, path)
+    else:
+        print_summary(args.path or path, None if args.run == "all" else args.run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load generator for scoring_service.py.
+
+Opens --concurrency keep-alive connections to the service and sends
+single-entity POST /predict requests sampled from data/test.csv for
+--duration seconds, then prints client-side requests/sec and latency along
+with the service's own /stats counters.
+
+    python scoring_service.py --port 8080 &
+    python load_test_service.py --port 8080 --concurrency 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b""):
+            break
+        key, value = header.decode().split(":", 1)
+        if key.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, records, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        status, _ = await request(reader, writer, "POST", "/predict", random.choice(records))
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(status)
+    writer.close()
+
+
+async def run(host, port, concurrency, duration):
+    records = json.loads(pd.read_csv("data/test.csv").to_json(orient="records"))
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        client(host, port, records, deadline, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1e3
+    print(f"Concurrency: {concurrency}, duration: {elapsed:.1f}s")
+    print(f"Requests OK: {len(latencies)}, errors: {len(errors)}")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} req/s")
+    if len(lat):
+        print(f"Client latency p50={np.percentile(lat, 50):.1f}ms "
+              f"p99={np.percentile(lat, 99):.1f}ms")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+    print("\nService /stats:")
+    for key, value in stats.items():
+        print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
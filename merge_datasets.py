@@ -1,12 +1,9 @@
 import pandas as pd
+from entity_join import build_entity_frame
+from schema import compact, read_source
+from storage import read_table, write_table
 
-# Merge all after outlier fixing
-def merge_after_outlier():
-    df1 = pd.read_csv("data/train_outliers_fixed.csv")
-    df2 = pd.read_csv("data/environmental_activities_outliers_fixed.csv")
-    df3 = pd.read_csv("data/revenue_distribution_by_sector.csv")
-    df4 = pd.read_csv("data/sustainable_development_goals.csv")
-
+def outer_merge(df1, df2, df3, df4):
     merged = pd.merge(df1, df2, on="entity_id", how="outer")
     merged = pd.merge(merged, df3, on="entity_id", how="outer")
     merged = pd.merge(merged, df4, on="entity_id", how="outer")
@@ -15,9 +12,19 @@ def merge_after_outlier():
 
     # Remove rows that have missing columns region_id until target_scope_2
     merged = merged[merged.loc[:, "region_code":"target_scope_2"].notnull().all(axis=1)]
+    return merged
+
+# Merge all after outlier fixing
+def merge_after_outlier():
+    df1 = compact(read_table("train_outliers_fixed"), "train_outliers_fixed")
+    df2 = compact(read_table("environmental_activities_outliers_fixed"), "environmental_activities_outliers_fixed")
+    df3 = read_source("data/revenue_distribution_by_sector.csv")
+    df4 = read_source("data/sustainable_development_goals.csv")
 
-    merged.to_csv("data/merged_dataset.csv", index=False)
-    print("Merged dataset saved to data/merged_dataset.csv")
+    merged = compact(outer_merge(df1, df2, df3, df4), "merged_dataset")
+
+    path = write_table(merged, "merged_dataset")
+    print(f"Merged dataset saved to {path}")
 
     print("Missing values per column in merged dataset:")
     missing_counts = merged.isnull().sum()
@@ -43,10 +50,10 @@ def merge_after_outlier():
 
 
 def merge_after_nan():
-    df1 = pd.read_csv("data/merged_dataset.csv")
+    df1 = read_table("merged_dataset")
 
-    df2 = pd.read_csv("data/merged_dataset_imputed_activity.csv")
-    df3 = pd.read_csv("data/merged_dataset_imputed_sdg.csv")
+    df2 = read_table("merged_dataset_imputed_activity")
+    df3 = read_table("merged_dataset_imputed_sdg")
 
     cols_to_merge = ['activity_type','activity_code','env_score_adjustment','env_score_adjustment_capped']
 
@@ -55,14 +62,42 @@ def merge_after_nan():
     cols_to_merge = ['sdg_id', 'sdg_name']
 
     df1[cols_to_merge] = df3[cols_to_merge].values
+    # .values assignment falls back to object columns
+    df1 = compact(df1, "merged_dataset_complete")
 
-    df1.to_csv("data/merged_dataset_complete.csv", index=False)
-    print("Cleaned merged dataset saved to data/merged_dataset_cleaned.csv")
+    path = write_table(df1, "merged_dataset_complete")
+    print(f"Cleaned merged dataset saved to {path}")
 
     print("Missing values per column in merged dataset:")
     missing_counts = df1.isnull().sum()
     for col, count in missing_counts.items():
         print(f"{col}: {count}")
 
+# Entity-level alternative to merge_after_outlier: each 1:many table is
+# aggregated per entity before the join, so no activity x sector x SDG product.
+# Not a pipeline stage: the imputers and FeaturePipeline work on merged rows
+# (see entity_join.py)
+def merge_entity_level():
+    df1 = compact(read_table("train_outliers_fixed"), "train_outliers_fixed")
+    df2 = compact(read_table("environmental_activities_outliers_fixed"), "environmental_activities_outliers_fixed")
+    df3 = read_source("data/revenue_distribution_by_sector.csv")
+    df4 = read_source("data/sustainable_development_goals.csv")
+
+    merged = build_entity_frame(df1, df2, df3, df4)
+    merged.sort_values(by="entity_id", inplace=True)
+
+    path = write_table(merged, "merged_entities")
+    print(f"Entity-level dataset saved to {path}")
+    print("Total number of rows:", len(merged))
+    print("Entities without activities:", (merged["has_activity"] == 0).sum())
+    print("Entities without SDGs:", (merged["has_sdg"] == 0).sum())
+
+
 if __name__ == "__main__":
-    merge_after_outlier()
\ No newline at end of file
+    import sys
+    if "--entity-level" in sys.argv:
+        merge_entity_level()
+    elif "--after-nan" in sys.argv:
+        merge_after_nan()
+    else:
+        merge_after_outlier()
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Neighbour-search backends for knn_sdg_imputation.py.
+
+Each index is built once over a training matrix and answers query(Q, k)
+with (distances, indices) sorted nearest first, so neighbour lists can be
+computed once at the largest k and sliced for every smaller k. vote() turns
+a neighbour list into KNeighborsClassifier(weights="distance") probabilities.
+
+    brute   exact, chunked NumPy distances
+    kdtree  exact, sklearn KDTree
+    ivf     approximate, inverted file over k-means cells (pure NumPy);
+            n_probe cells are searched per query
+"""
+
+import numpy as np
+
+BACKENDS = ("brute", "kdtree", "ivf")
+QUERY_CHUNK = 512
+
+
+def squared_distances(Q, X, X_sq=None):
+    X_sq = (X ** 2).sum(axis=1) if X_sq is None else X_sq
+    # In place: one (len(Q), len(X)) buffer instead of a temporary per term
+    d = Q @ X.T
+    d *= -2
+    d += (Q ** 2).sum(axis=1)[:, None]
+    d += X_sq[None, :]
+    return np.maximum(d, 0.0, out=d)
+
+
+def top_k(d, idx, k):
+    """k smallest of each row of d (ties broken by index), nearest first."""
+    if d.shape[1] > k:
+        part = np.argpartition(d, k - 1, axis=1)[:, :k]
+        d = np.take_along_axis(d, part, axis=1)
+        idx = np.take_along_axis(idx, part, axis=1)
+    order = np.lexsort((idx, d), axis=1)
+    return np.take_along_axis(d, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+
+def refine(Q, X, idx):
+    """Exact distances for candidate neighbours, re-sorted nearest first.
+
+    The expanded |q|^2 - 2 q.x + |x|^2 form loses exact zeros (duplicate
+    rows), which decide the vote weights, so the final k are recomputed.
+    """
+    valid = idx >= 0
+    diff = Q[:, None, :] - X[np.where(valid, idx, 0)]
+    d = np.where(valid, (diff ** 2).sum(axis=2), np.inf)
+    d, idx = top_k(d, idx, idx.shape[1])
+    return np.sqrt(d), idx
+
+
+class BruteForceIndex:
+    def __init__(self, X):
+        self.X = np.asarray(X, dtype=np.float64)
+        self.X_sq = (self.X ** 2).sum(axis=1)
+
+    def query(self, Q, k):
+        Q = np.asarray(Q, dtype=np.float64)
+        k = min(k, len(self.X))
+        dist = np.empty((len(Q), k))
+        ind = np.empty((len(Q), k), dtype=np.int64)
+        all_idx = np.arange(len(self.X))
+        for start in range(0, len(Q), QUERY_CHUNK):
+            chunk = Q[start:start + QUERY_CHUNK]
+            d = squared_distances(chunk, self.X, self.X_sq)
+            idx = np.broadcast_to(all_idx, d.shape)
+            d, idx = top_k(d, idx, k)
+            dist[start:start + QUERY_CHUNK], ind[start:start + QUERY_CHUNK] = refine(chunk, self.X, idx)
+        return dist, ind
+
+
+class KDTreeIndex:
+    def __init__(self, X, leaf_size=40):
+        from sklearn.neighbors import KDTree
+
+        self.n = len(X)
+        self.tree = KDTree(np.asarray(X, dtype=np.float64), leaf_size=leaf_size)
+
+    def query(self, Q, k):
+        return self.tree.query(np.asarray(Q, dtype=np.float64), k=min(k, self.n))
+
+
+class IVFIndex:
+    def __init__(self, X, n_lists=None, n_probe=8, n_iter=10, random_state=0):
+        self.X = np.asarray(X, dtype=np.float64)
+        self.X_sq = (self.X ** 2).sum(axis=1)
+        n_lists = min(len(self.X), n_lists or max(1, int(np.sqrt(len(self.X)))))
+        self.n_probe = min(n_probe, n_lists)
+
+        # Coarse quantizer: a few Lloyd iterations from random rows
+        rng = np.random.default_rng(random_state)
+        self.centroids = self.X[rng.choice(len(self.X), n_lists, replace=False)]
+        for _ in range(n_iter):
+            assign = self.nearest_cells(self.X, 1)[:, 0]
+            counts = np.bincount(assign, minlength=n_lists)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assign, self.X)
+            filled = counts > 0
+            self.centroids[filled] = sums[filled] / counts[filled, None]
+        assign = self.nearest_cells(self.X, 1)[:, 0]
+
+        # Inverted lists: rows sorted by cell, cell l is order[offsets[l]:offsets[l + 1]]
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.searchsorted(assign[self.order], np.arange(n_lists + 1))
+
+    def nearest_cells(self, Q, n):
+        cells = np.empty((len(Q), n), dtype=np.int64)
+        for start in range(0, len(Q), QUERY_CHUNK):
+            d = squared_distances(Q[start:start + QUERY_CHUNK], self.centroids)
+            idx = np.broadcast_to(np.arange(len(self.centroids)), d.shape)
+            cells[start:start + QUERY_CHUNK] = top_k(d, idx, n)[1]
+        return cells
+
+    def query(self, Q, k):
+        Q = np.asarray(Q, dtype=np.float64)
+        k = min(k, len(self.X))
+        best_d = np.full((len(Q), k), np.inf)
+        best_i = np.full((len(Q), k), -1, dtype=np.int64)
+
+        # Visit each probed cell once, with every query that probes it
+        probes = self.nearest_cells(Q, self.n_probe)
+        query_ids = np.repeat(np.arange(len(Q)), self.n_probe)
+        cells = probes.ravel()
+        by_cell = np.argsort(cells, kind="stable")
+        bounds = np.searchsorted(cells[by_cell], np.arange(len(self.centroids) + 1))
+        for cell in range(len(self.centroids)):
+            q = query_ids[by_cell[bounds[cell]:bounds[cell + 1]]]
+            members = self.order[self.offsets[cell]:self.offsets[cell + 1]]
+            if len(q) == 0 or len(members) == 0:
+                continue
+            d = squared_distances(Q[q], self.X[members], self.X_sq[members])
+            cand_d = np.hstack([best_d[q], d])
+            cand_i = np.hstack([best_i[q], np.broadcast_to(members, d.shape)])
+            best_d[q], best_i[q] = top_k(cand_d, cand_i, k)
+        return refine(Q, self.X, best_i)
+
+
+def make_index(backend, X, **kwargs):
+    if backend == "brute":
+        return BruteForceIndex(X)
+    if backend == "kdtree":
+        return KDTreeIndex(X, **kwargs)
+    if backend == "ivf":
+        return IVFIndex(X, **kwargs)
+    raise ValueError(f"Unknown neighbour backend {backend!r}, expected one of {BACKENDS}")
+
+
+def vote(dist, ind, y_codes, n_classes, k):
+    """Distance-weighted class probabilities from the first k neighbours.
+
+    Matches KNeighborsClassifier(weights="distance"): weights are 1/distance,
+    and a query with exact matches uses only those. y_codes are class indices.
+    """
+    dist, ind = dist[:, :k], ind[:, :k]
+    # IVF may return fewer than k real neighbours (index -1)
+    valid = ind >= 0
+    with np.errstate(divide="ignore"):
+        weights = 1.0 / dist
+    exact = dist == 0
+    has_exact = exact.any(axis=1)
+    weights[has_exact] = exact[has_exact].astype(float)
+    weights[~valid] = 0.0
+
+    proba = np.zeros((len(dist), n_classes))
+    rows = np.repeat(np.arange(len(dist)), ind.shape[1])
+    np.add.at(proba, (rows, y_codes[np.where(valid, ind, 0)].ravel()), weights.ravel())
+    return proba / proba.sum(axis=1, keepdims=True)
@@ -1,9 +1,10 @@
 import os
 import sys
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import charts
+from plot_renderer import PlotRenderer
+from schema import read_source
+from storage import write_table
 
 class Tee:
     def __init__(self, filename):
@@ -20,33 +21,16 @@ class Tee:
 
 sys.stdout = Tee("outlier_treatment_output.txt")
 
-os.makedirs("plots/outlier_treatment/revenue", exist_ok=True)
-os.makedirs("plots/outlier_treatment/env_activities", exist_ok=True)
+plots = PlotRenderer()
 
-train = pd.read_csv("data/train.csv")
-env_activities = pd.read_csv("data/environmental_activities.csv")
+train = read_source("data/train.csv")
+env_activities = read_source("data/environmental_activities.csv")
 
 def plot_before_after(series_before, series_after, name, outdir):
     sb = series_before.dropna()
     sa = series_after.dropna()
-
-    fig, axes = plt.subplots(1, 2, figsize=(10, 4))
-    sns.histplot(sb, kde=True, ax=axes[0])
-    axes[0].set_title(f"{name} before")
-    sns.histplot(sa, kde=True, ax=axes[1])
-    axes[1].set_title(f"{name} after")
-    fig.tight_layout()
-    fig.savefig(os.path.join(outdir, f"{name}_hist_before_after.png"))
-    plt.close(fig)
-
-    fig, axes = plt.subplots(1, 2, figsize=(8, 4))
-    sns.boxplot(x=sb, ax=axes[0])
-    axes[0].set_title(f"{name} before")
-    sns.boxplot(x=sa, ax=axes[1])
-    axes[1].set_title(f"{name} after")
-    fig.tight_layout()
-    fig.savefig(os.path.join(outdir, f"{name}_box_before_after.png"))
-    plt.close(fig)
+    plots.submit(os.path.join(outdir, f"{name}_hist_before_after.png"), charts.hist_before_after, sb, sa, name)
+    plots.submit(os.path.join(outdir, f"{name}_box_before_after.png"), charts.box_before_after, sb, sa, name)
 
 print("=== Phase 3: Outlier Treatment ===")
 
@@ -78,10 +62,12 @@ for activity_type, group in env_activities.groupby("activity_type"):
         "plots/outlier_treatment/env_activities"
     )
 
-train.to_csv("data/train_outliers_fixed.csv", index=False)
-env_activities.to_csv("data/environmental_activities_outliers_fixed.csv", index=False)
+train_path = write_table(train, "train_outliers_fixed")
+env_path = write_table(env_activities, "environmental_activities_outliers_fixed")
 
 print("\nSaved:")
-print("  data/train_outliers_fixed.csv")
-print("  data/environmental_activities_outliers_fixed.csv")
-print("Plots in plots/outlier_treatment/")
+print(f"  {train_path}")
+print(f"  {env_path}")
+plots.render()
+if plots.enabled:
+    print("Plots in plots/outlier_treatment/")
@@ -0,0 +1,78 @@
+"""
+Multi-process batch scoring for predict_both_scopes.py.
+
+The feature frame is split into contiguous row shards that a process pool
+scores in parallel, one thread per worker (BLAS/OpenMP pools via
+threadpoolctl, model n_jobs, CatBoost thread_count). Workers are forked
+after the models, feature_cols and the frame are in memory, so they read
+them copy-on-write instead of unpickling a copy each; only the shard
+bounds go to the workers and only the predictions come back. Shards are
+reassembled in input order.
+
+Where fork is unavailable the same objects are pickled once per worker at
+start-up.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from predict_both_scopes import predict_scopes
+
+SHARDS_PER_WORKER = 4
+
+_shared = None
+_limits = None
+_n_threads = None
+
+
+def _init_worker(shared, n_threads):
+    global _shared, _limits, _n_threads
+    if shared is not None:
+        _shared = shared
+    _n_threads = n_threads
+    _limits = threadpool_limits(limits=n_threads)
+    _, _, best_scope1, best_scope2 = _shared
+    # CatBoost gets its thread count per predict call (predict_scopes)
+    for model in (best_scope1, best_scope2):
+        if "n_jobs" in getattr(model, "get_params", dict)():
+            model.set_params(n_jobs=n_threads)
+
+
+def _predict_shard(start, stop):
+    df_test, feature_cols, best_scope1, best_scope2 = _shared
+    return predict_scopes(df_test.iloc[start:stop], feature_cols, best_scope1, best_scope2, n_threads=_n_threads)
+
+
+def shard_bounds(n_rows, n_shards):
+    edges = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def predict_parallel(df_test, feature_cols, best_scope1, best_scope2, n_workers=None, n_shards=None):
+    """predict_scopes over n_workers processes; rows come back in df_test order."""
+    global _shared
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1 or len(df_test) == 0:
+        return predict_scopes(df_test, feature_cols, best_scope1, best_scope2)
+
+    bounds = shard_bounds(len(df_test), n_shards or n_workers * SHARDS_PER_WORKER)
+    shared = (df_test, feature_cols, best_scope1, best_scope2)
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    # Set before the pool forks so workers inherit it
+    _shared = shared
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("fork" if fork else None),
+            initializer=_init_worker,
+            initargs=(None if fork else shared, 1),
+        ) as pool:
+            parts = list(pool.map(_predict_shard, *zip(*bounds)))
+    finally:
+        _shared = None
+    return pd.concat(parts, ignore_index=True)
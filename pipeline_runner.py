@@ -0,0 +1,272 @@
+"""
+DAG runner for the training pipeline with content-hash caching.
+
+Each stage declares the script it runs, the files/checkpoints it reads and
+the ones it writes. A stage's fingerprint covers its input file contents, its
+script and every local module the script imports (transitively), the
+checkpoint storage format and the values of the environment switches the
+stage declares (PIPELINE_COMPACT, GB_BACKEND, KNN_BACKEND). Stages whose fingerprint and outputs match the
+last successful run are skipped; independent stages run in parallel.
+
+    python pipeline_runner.py                    # run everything that is stale
+    python pipeline_runner.py --target feature_engineering
+    python pipeline_runner.py --force knn_sdg_imputation --jobs 2
+    python pipeline_runner.py --dry-run          # show what would run
+    python pipeline_runner.py --profile          # also record metrics (instrumentation.py)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from code_hash import ROOT, hash_file, local_modules
+from instrumentation import DEFAULT_PATH, PROFILE_ENV, RUN_ENV, print_summary, profile_path, run_id
+from storage import checkpoint_path, default_format, resolve_path
+
+CACHE_PATH = ".pipeline_cache/state.json"
+
+
+class Stage:
+    def __init__(self, name, command, inputs, outputs, env=("PIPELINE_COMPACT",)):
+        self.name = name
+        self.command = command
+        self.inputs = inputs
+        self.outputs = outputs
+        # Environment variables that change what the stage writes
+        self.env = env
+
+    @property
+    def script(self):
+        return self.command[0]
+
+
+# Inputs/outputs without a "/" are storage checkpoint names; others are paths
+STAGES = [
+    Stage(
+        "outlier_treatment",
+        ["outlier_treatment.py"],
+        inputs=["data/train.csv", "data/environmental_activities.csv"],
+        outputs=["train_outliers_fixed", "environmental_activities_outliers_fixed"],
+    ),
+    Stage(
+        "merge_datasets",
+        ["merge_datasets.py"],
+        inputs=[
+            "train_outliers_fixed",
+            "environmental_activities_outliers_fixed",
+            "data/revenue_distribution_by_sector.csv",
+            "data/sustainable_development_goals.csv",
+        ],
+        outputs=["merged_dataset"],
+    ),
+    Stage(
+        "gb_env_imputation",
+        ["gb_env_imputation.py", "--compare-backends"],
+        inputs=["merged_dataset"],
+        outputs=["merged_dataset_imputed_activity"],
+        env=("PIPELINE_COMPACT", "GB_BACKEND"),
+    ),
+    Stage(
+        "knn_sdg_imputation",
+        ["knn_sdg_imputation.py"],
+        inputs=["merged_dataset"],
+        outputs=["merged_dataset_imputed_sdg", "data/sdg_imputation_details.csv"],
+        env=("PIPELINE_COMPACT", "KNN_BACKEND"),
+    ),
+    Stage(
+        "merge_after_nan",
+        ["merge_datasets.py", "--after-nan"],
+        inputs=["merged_dataset", "merged_dataset_imputed_activity", "merged_dataset_imputed_sdg"],
+        outputs=["merged_dataset_complete"],
+    ),
+    Stage(
+        "feature_engineering",
+        ["feature_engineering.py"],
+        inputs=["merged_dataset_complete"],
+        outputs=["data_after_feature_extraction", "models/feature_pipeline.joblib"],
+    ),
+    Stage(
+        "training_model",
+        ["training_model.py"],
+        inputs=["data_after_feature_extraction", "models/feature_pipeline.joblib"],
+        outputs=[
+            "data_after_feature_engineering",
+            "data/model_metrics.csv",
+            "data/search_curves.csv",
+            "models/best_scope1.joblib",
+            "models/best_scope2.joblib",
+            "models/best_scope1.npz",
+            "models/best_scope2.npz",
+            "models/feature_cols.joblib",
+        ],
+    ),
+]
+
+
+def is_path(ref):
+    return "/" in ref
+
+
+def input_path(ref):
+    return ref if is_path(ref) else resolve_path(ref)[0]
+
+
+def output_path(ref):
+    return ref if is_path(ref) else checkpoint_path(ref)
+
+
+def fingerprint(stage):
+    digest = hashlib.sha256()
+    env = {var: os.environ.get(var) for var in stage.env}
+    digest.update(json.dumps([stage.command, default_format(), env], sort_keys=True).encode())
+    for module in sorted(local_modules(stage.script)):
+        digest.update(module.encode())
+        hash_file(os.path.join(ROOT, module), digest)
+    for ref in stage.inputs:
+        digest.update(ref.encode())
+        hash_file(input_path(ref), digest)
+    return digest.hexdigest()
+
+
+def output_hashes(stage):
+    return {ref: hash_file(output_path(ref)).hexdigest() for ref in stage.outputs}
+
+
+def load_cache(path=CACHE_PATH):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_cache(cache, path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(cache, f, indent=2)
+
+
+def is_fresh(stage, cache):
+    entry = cache.get(stage.name)
+    if entry is None:
+        return False
+    try:
+        return entry["fingerprint"] == fingerprint(stage) and entry["outputs"] == output_hashes(stage)
+    except FileNotFoundError:
+        return False
+
+
+def dependencies(stages):
+    producer = {ref: s.name for s in stages for ref in s.outputs}
+    return {s.name: {producer[ref] for ref in s.inputs if ref in producer} for s in stages}
+
+
+def select(stages, target):
+    if target is None:
+        return stages
+    deps = dependencies(stages)
+    wanted, todo = set(), [target]
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in stages if s.name in wanted]
+
+
+def run_stage(stage):
+    # With a profile set, each stage runs inside an instrumentation "stage" span
+    wrapper = ["instrumentation.py", "run"] if profile_path() else []
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable] + wrapper + stage.command, cwd=ROOT, capture_output=True, text=True
+    )
+    return result, time.perf_counter() - start
+
+
+def run(stages, jobs, force=(), dry_run=False):
+    deps = dependencies(stages)
+    by_name = {s.name: s for s in stages}
+    cache = load_cache()
+    done, failed, ran = set(), set(), set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(done) + len(failed) < len(stages):
+            blocked = {n for n in by_name if deps[n] & failed} - failed
+            failed |= blocked
+            for name in blocked:
+                print(f"[skip] {name}: upstream stage failed")
+
+            for name, stage in by_name.items():
+                if name in done or name in failed or name in running.values():
+                    continue
+                if not deps[name] <= done:
+                    continue
+                # Upstream stages that re-ran but produced identical outputs leave
+                # the fingerprint unchanged, so downstream stages stay cached
+                stale = name in force or (dry_run and deps[name] & ran) or not is_fresh(stage, cache)
+                if not stale:
+                    print(f"[cached] {name}")
+                    done.add(name)
+                    continue
+                if dry_run:
+                    print(f"[would run] {name}")
+                    done.add(name)
+                    ran.add(name)
+                    continue
+                print(f"[run] {name}: {' '.join(stage.command)}", flush=True)
+                running[pool.submit(run_stage, stage)] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                result, elapsed = future.result()
+                if result.returncode != 0:
+                    print(f"[failed] {name} after {elapsed:.1f}s (exit code {result.returncode})")
+                    print(result.stderr)
+                    failed.add(name)
+                    continue
+                print(f"[done] {name} in {elapsed:.1f}s")
+                stage = by_name[name]
+                cache[name] = {
+                    "fingerprint": fingerprint(stage),
+                    "outputs": output_hashes(stage),
+                    "seconds": elapsed,
+                }
+                save_cache(cache)
+                done.add(name)
+                ran.add(name)
+
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=[s.name for s in STAGES])
+    parser.add_argument("--force", nargs="*", default=[], choices=[s.name for s in STAGES])
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PATH, default=None,
+                        help=f"record stage/model metrics as JSON lines (default {DEFAULT_PATH})")
+    args = parser.parse_args()
+
+    if args.profile:
+        os.environ[PROFILE_ENV] = os.path.abspath(args.profile)
+        os.environ.pop(RUN_ENV, None)
+        run_id()
+    ok = run(select(STAGES, args.target), args.jobs, set(args.force), args.dry_run)
+    if args.profile and not args.dry_run and os.path.exists(args.profile):
+        print(f"\nProfile of run {os.environ[RUN_ENV]} ({args.profile}):")
+        print_summary(args.profile, os.environ[RUN_ENV])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
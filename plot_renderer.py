@@ -0,0 +1,162 @@
+"""
+Deferred, headless rendering of the scripts' charts.
+
+Scripts queue charts instead of drawing them inline:
+
+    plots = PlotRenderer()
+    plots.submit("plots/sdg_confusion_matrix.png", charts.confusion_heatmap, cm, labels, title,
+                 savefig={"dpi": 300, "bbox_inches": "tight"})
+    ...
+    plots.render()
+
+Rendering is off by default for the pipeline stages (outlier_treatment.py,
+knn_sdg_imputation.py); pass --plots or set PIPELINE_PLOTS=1 to render.
+The analysis scripts, whose charts are their output, render unless
+PIPELINE_PLOTS=0. render() draws with the Agg backend, in PLOT_WORKERS
+forked worker processes (default: one per core) when more than one chart is
+queued and the platform can fork. A chart is skipped when its file exists
+and the hash of its chart function's source, arguments and savefig options
+matches the one recorded in .plot_cache/manifest.json when it was last
+rendered.
+"""
+
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ENABLED_ENV = "PIPELINE_PLOTS"
+MANIFEST_PATH = ".plot_cache/manifest.json"
+
+
+def plots_enabled(default=False):
+    if "--plots" in sys.argv:
+        return True
+    value = os.environ.get(ENABLED_ENV)
+    return default if value is None else value == "1"
+
+
+def _update(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(repr((type(value).__name__, getattr(value, "name", None))).encode())
+        digest.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else []).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(repr(key).encode())
+            _update(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+
+
+def chart_hash(chart, args, kwargs, savefig):
+    digest = hashlib.sha1(f"{chart.__module__}.{chart.__qualname__}".encode())
+    try:
+        digest.update(inspect.getsource(chart).encode())
+    except (OSError, TypeError):
+        pass
+    _update(digest, (args, kwargs, savefig))
+    return digest.hexdigest()
+
+
+def _render(path, chart, args, kwargs, savefig):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # rc_context undoes any theme the chart sets (sns.set) before the next chart
+    with plt.rc_context():
+        fig = chart(*args, **kwargs)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fig.savefig(path, **savefig)
+        plt.close(fig)
+    return path
+
+
+def _try_render(job):
+    # One chart failing (e.g. on a missing optional dependency) doesn't lose the others
+    try:
+        _render(*job)
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+    return None
+
+
+class PlotRenderer:
+    def __init__(self, enabled=None, default=False, workers=None, manifest_path=MANIFEST_PATH):
+        self.enabled = plots_enabled(default) if enabled is None else enabled
+        self.workers = workers or int(os.environ.get("PLOT_WORKERS", os.cpu_count()))
+        self.manifest_path = manifest_path
+        self.jobs = []
+
+    def submit(self, path, chart, *args, savefig=None, **kwargs):
+        """Queue chart(*args, **kwargs), to be saved to path by render(); don't mutate the arguments in between."""
+        self.jobs.append((path, chart, args, kwargs, savefig or {}))
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+    def render(self):
+        """Render the queued charts that changed; returns the paths rendered."""
+        jobs, self.jobs = self.jobs, []
+        if not self.enabled:
+            if jobs:
+                print(f"[plots] {len(jobs)} charts not rendered (--plots or {ENABLED_ENV}=1 to render)")
+            return []
+
+        start = time.perf_counter()
+        manifest = self.load_manifest()
+        keys, todo = [], []
+        for job in jobs:
+            key = chart_hash(*job[1:])
+            if manifest.get(job[0]) == key and os.path.exists(job[0]):
+                continue
+            keys.append(key)
+            todo.append(job)
+
+        workers = min(self.workers, len(todo))
+        # Without fork (Windows), render in this process
+        if "fork" not in multiprocessing.get_all_start_methods():
+            workers = 1
+        if workers > 1:
+            # fork: spawned workers would re-run the calling script's top-level code
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                errors = list(pool.map(_try_render, todo))
+        else:
+            errors = [_try_render(job) for job in todo]
+
+        rendered = []
+        for key, job, error in zip(keys, todo, errors):
+            if error is None:
+                manifest[job[0]] = key
+                rendered.append(job[0])
+            else:
+                print(f"[plots] failed {job[0]}: {error}")
+        if rendered:
+            self.save_manifest(manifest)
+        failed = len(todo) - len(rendered)
+        print(f"[plots] {len(rendered)} rendered, {len(jobs) - len(rendered) - failed} unchanged, {failed} failed "
+              f"({time.perf_counter() - start:.1f}s, {max(workers, 1)} processes)")
+        return rendered
@@ -1,34 +1,81 @@
 import pandas as pd
 import numpy as np
 import joblib
+import os
+import sys
+from instrumentation import span
+from storage import read_table
 
-# Load the test data that has been processed with feature engineering
-df_test = pd.read_csv("data/test_after_feature_engineering.csv")
 
-# Note: Test data doesn't have target columns
-# Keep nace_level_2_code as it might be a feature
-drop_cols = ["country_code", "entity_id"]
+def load_models(model_dir="models", compiled=False):
+    feature_cols = joblib.load(f"{model_dir}/feature_cols.joblib")
+    if compiled:
+        # Flat-array exports written by compiled_trees.py
+        from compiled_trees import load_compiled
+        load, ext = load_compiled, "npz"
+    else:
+        load, ext = joblib.load, "joblib"
+    # training_model.py --joint saves one multi-output model for both scopes
+    if os.path.exists(f"{model_dir}/best_joint.joblib"):
+        best_joint = load(f"{model_dir}/best_joint.{ext}")
+        return feature_cols, best_joint, best_joint
+    best_scope1 = load(f"{model_dir}/best_scope1.{ext}")
+    best_scope2 = load(f"{model_dir}/best_scope2.{ext}")
+    return feature_cols, best_scope1, best_scope2
 
-base_features_test = df_test.drop(columns=drop_cols, errors="ignore")
 
-feature_cols = joblib.load("models/feature_cols.joblib")
-X_test = base_features_test[feature_cols]
+def _predict(model, X, n_threads=None):
+    with span("predict", type(model).__name__, rows_in=len(X), rows_out=len(X)):
+        # CatBoost's predict ignores the model's thread_count and uses every core
+        if n_threads is not None and type(model).__name__.startswith("CatBoost"):
+            return model.predict(X, thread_count=n_threads)
+        return model.predict(X)
 
-best_scope1 = joblib.load("models/best_scope1.joblib")
-best_scope2 = joblib.load("models/best_scope2.joblib")
 
-pred_scope1_log = best_scope1.predict(X_test)
-pred_scope2_log = best_scope2.predict(X_test)
+def predict_scopes(df_test, feature_cols, best_scope1, best_scope2, n_threads=None):
+    # Note: Test data doesn't have target columns
+    # Keep nace_level_2_code as it might be a feature
+    drop_cols = ["country_code", "entity_id"]
 
-# Convert from log scale back to original scale using expm1 (inverse of log1p)
-pred_scope1 = np.expm1(pred_scope1_log)
-pred_scope2 = np.expm1(pred_scope2_log)
+    base_features_test = df_test.drop(columns=drop_cols, errors="ignore")
+    X_test = base_features_test[feature_cols]
 
-out = pd.DataFrame({
-    "entity_id": df_test["entity_id"],
-    "pred_target_scope_1": pred_scope1,
-    "pred_target_scope_2": pred_scope2,
-})
+    if best_scope1 is best_scope2:
+        # Joint model: one predict call returns both log targets
+        pred_log = _predict(best_scope1, X_test, n_threads)
+        pred_scope1_log, pred_scope2_log = pred_log[:, 0], pred_log[:, 1]
+    else:
+        pred_scope1_log = _predict(best_scope1, X_test, n_threads)
+        pred_scope2_log = _predict(best_scope2, X_test, n_threads)
 
-out.to_csv("data/test_predictions.csv", index=False)
-print("Saved predictions to data/test_predictions.csv")
\ No newline at end of file
+    # Convert from log scale back to original scale using expm1 (inverse of log1p)
+    pred_scope1 = np.expm1(pred_scope1_log)
+    pred_scope2 = np.expm1(pred_scope2_log)
+
+    return pd.DataFrame({
+        "entity_id": df_test["entity_id"].values,
+        "pred_target_scope_1": pred_scope1,
+        "pred_target_scope_2": pred_scope2,
+    })
+
+
+def main():
+    # Load the test data that has been processed with feature engineering
+    df_test = read_table("test_after_feature_engineering")
+
+    feature_cols, best_scope1, best_scope2 = load_models(compiled="--compiled" in sys.argv)
+    if "--parallel" in sys.argv:
+        # Row shards over SCORING_WORKERS processes (default: every core),
+        # see parallel_scoring.py
+        from parallel_scoring import predict_parallel
+        n_workers = int(os.environ.get("SCORING_WORKERS", os.cpu_count() or 1))
+        out = predict_parallel(df_test, feature_cols, best_scope1, best_scope2, n_workers=n_workers)
+    else:
+        out = predict_scopes(df_test, feature_cols, best_scope1, best_scope2)
+
+    out.to_csv("data/test_predictions.csv", index=False)
+    print("Saved predictions to data/test_predictions.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,87 @@
-import pandas as pd
 import numpy as np
+from storage import read_table, write_table
 
-# Read the CSV file
-df = pd.read_csv('data/merged_dataset.csv')
+SDG_COLS = ['sdg_id_1', 'sdg_id_2', 'sdg_id_3']
 
-# For each entity, calculate the additional columns
+
+# For each entity, calculate the additional columns (reference implementation,
+# one Python call per entity; kept for benchmark_process_entities.py)
 def calculate_entity_features(group):
     # Get unique SDG IDs (excluding NaN values)
     sdg_ids = group['sdg_id'].dropna().unique()
-    
+
     # Calculate total revenue_pct for this entity
     total_revenue_pct = group['revenue_pct'].sum()
-    
+
     # Create the additional columns (same value for all rows in the group)
     result = group.copy()
-    
+
     # Add SDG IDs (up to 3)
     result['sdg_id_1'] = sdg_ids[0] if len(sdg_ids) > 0 else np.nan
     result['sdg_id_2'] = sdg_ids[1] if len(sdg_ids) > 1 else np.nan
     result['sdg_id_3'] = sdg_ids[2] if len(sdg_ids) > 2 else np.nan
-    
+
     # One-hot encoding for revenue_pct not summing to 1
     # Using a tolerance of 0.001 for floating point comparison
     result['revenue_pct_not_1'] = 1 if abs(total_revenue_pct - 1.0) > 0.001 else 0
-    
+
     # Flag for having no SDG goals at all
     result['no_sdg_goals'] = 1 if len(sdg_ids) == 0 else 0
-    
+
     return result
 
-# Apply the grouping and processing, then sort by revenue_pct descending within each group
-processed_df = df.groupby('entity_id', group_keys=False).apply(
-    lambda x: calculate_entity_features(x.sort_values('revenue_pct', ascending=False))
-)
-
-# Convert SDG ID columns to Int64 (nullable integer type) to handle NaN properly
-for col in ['sdg_id_1', 'sdg_id_2', 'sdg_id_3']:
-    processed_df[col] = processed_df[col].astype('Int64')
-
-# Reset index
-processed_df = processed_df.reset_index(drop=True)
-
-# Save to CSV
-output_file = 'data/processed_entities.csv'
-processed_df.to_csv(output_file, index=False)
-
-print(f"Processed data saved to {output_file}")
-print(f"\nDataset shape: {processed_df.shape}")
-print(f"\nFirst few rows:")
-print(processed_df.head(10))
-print(f"\nColumn names:")
-print(processed_df.columns.tolist())
-print(f"\nSummary statistics:")
-print(f"Total rows: {len(processed_df)}")
-print(f"Unique entities: {processed_df['entity_id'].nunique()}")
-print(f"Rows with revenue_pct not equal to 1: {processed_df[processed_df['revenue_pct_not_1'] == 1]['entity_id'].nunique()} entities")
-print(f"Rows with no SDG goals: {processed_df[processed_df['no_sdg_goals'] == 1]['entity_id'].nunique()} entities")
\ No newline at end of file
+
+def process_entities_apply(df):
+    processed_df = df.groupby('entity_id', group_keys=False).apply(
+        lambda x: calculate_entity_features(x.sort_values('revenue_pct', ascending=False, kind='stable'))
+    )
+    for col in SDG_COLS:
+        processed_df[col] = processed_df[col].astype('Int64')
+    return processed_df.reset_index(drop=True)
+
+
+def process_entities(df):
+    """Same output as process_entities_apply with one global sort and grouped ops."""
+    # Rows sorted by entity, then revenue_pct descending (NaN last), ties
+    # keeping their input order
+    df = df[df['entity_id'].notna()]
+    processed_df = df.sort_values(
+        ['entity_id', 'revenue_pct'], ascending=[True, False], kind='stable', na_position='last'
+    ).reset_index(drop=True)
+
+    # First three distinct SDG ids per entity, in sorted row order
+    sdg = processed_df[['entity_id', 'sdg_id']].dropna(subset=['sdg_id']).drop_duplicates()
+    sdg['rank'] = sdg.groupby('entity_id').cumcount()
+    top = sdg[sdg['rank'] < len(SDG_COLS)].pivot(index='entity_id', columns='rank', values='sdg_id')
+    top = top.reindex(columns=range(len(SDG_COLS)))
+    top.columns = SDG_COLS
+    processed_df = processed_df.join(top.astype('Int64'), on='entity_id')
+
+    # Using a tolerance of 0.001 for floating point comparison
+    total_revenue_pct = processed_df.groupby('entity_id')['revenue_pct'].transform('sum')
+    processed_df['revenue_pct_not_1'] = ((total_revenue_pct - 1.0).abs() > 0.001).astype(np.int64)
+    processed_df['no_sdg_goals'] = processed_df['sdg_id_1'].isna().astype(np.int64)
+    return processed_df
+
+
+def main():
+    df = read_table("merged_dataset")
+    processed_df = process_entities(df)
+
+    output_file = write_table(processed_df, "processed_entities")
+
+    print(f"Processed data saved to {output_file}")
+    print(f"\nDataset shape: {processed_df.shape}")
+    print(f"\nFirst few rows:")
+    print(processed_df.head(10))
+    print(f"\nColumn names:")
+    print(processed_df.columns.tolist())
+    print(f"\nSummary statistics:")
+    print(f"Total rows: {len(processed_df)}")
+    print(f"Unique entities: {processed_df['entity_id'].nunique()}")
+    print(f"Rows with revenue_pct not equal to 1: {processed_df[processed_df['revenue_pct_not_1'] == 1]['entity_id'].nunique()} entities")
+    print(f"Rows with no SDG goals: {processed_df[processed_df['no_sdg_goals'] == 1]['entity_id'].nunique()} entities")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,35 +5,107 @@ This script:
 1. Processes the test.csv file with the same feature engineering as training
 2. Generates predictions using the trained models
 3. Converts predictions from log scale to original scale
+
+Scoring runs in-process through scoring.Scorer. Pass --subprocess to run the
+old process_test_data.py -> predict_both_scopes.py chain instead, or
+--chunk-size N to stream test.csv through the scorer N entities at a time
+(predictions are appended to the output as each chunk finishes), or
+--incremental to re-predict only the entities whose input rows changed
+since the last run (incremental_scoring.py):
+
+    python run_test_predictions.py --chunk-size 50000
+    python run_test_predictions.py --incremental
 """
 
+import argparse
 import subprocess
 import sys
 
-print("=" * 60)
-print("STEP 1: Processing test data with feature engineering")
-print("=" * 60)
-
-result = subprocess.run([sys.executable, "process_test_data.py"], capture_output=True, text=True)
-print(result.stdout)
-if result.stderr:
-    print("STDERR:", result.stderr)
-if result.returncode != 0:
-    print(f"Error in process_test_data.py (exit code {result.returncode})")
-    sys.exit(1)
-
-print("\n" + "=" * 60)
-print("STEP 2: Generating predictions on processed test data")
-print("=" * 60)
-
-result = subprocess.run([sys.executable, "predict_both_scopes.py"], capture_output=True, text=True)
-print(result.stdout)
-if result.stderr:
-    print("STDERR:", result.stderr)
-if result.returncode != 0:
-    print(f"Error in predict_both_scopes.py (exit code {result.returncode})")
-    sys.exit(1)
-
-print("\n" + "=" * 60)
-print("COMPLETE! Predictions saved to data/test_predictions.csv")
-print("=" * 60)
\ No newline at end of file
+
+def run_subprocess_chain():
+    print("=" * 60)
+    print("STEP 1: Processing test data with feature engineering")
+    print("=" * 60)
+
+    result = subprocess.run([sys.executable, "process_test_data.py"], capture_output=True, text=True)
+    print(result.stdout)
+    if result.stderr:
+        print("STDERR:", result.stderr)
+    if result.returncode != 0:
+        print(f"Error in process_test_data.py (exit code {result.returncode})")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print("STEP 2: Generating predictions on processed test data")
+    print("=" * 60)
+
+    result = subprocess.run([sys.executable, "predict_both_scopes.py"], capture_output=True, text=True)
+    print(result.stdout)
+    if result.stderr:
+        print("STDERR:", result.stderr)
+    if result.returncode != 0:
+        print(f"Error in predict_both_scopes.py (exit code {result.returncode})")
+        sys.exit(1)
+
+
+def run_in_process(compiled=False):
+    import pandas as pd
+    from scoring import Scorer
+
+    print("=" * 60)
+    print("Scoring test data in-process")
+    print("=" * 60)
+
+    scorer = Scorer(compiled=compiled)
+    df_test_raw = pd.read_csv("data/test.csv")
+    out = scorer.predict(df_test_raw)
+    out.to_csv("data/test_predictions.csv", index=False)
+    print(f"Scored {len(out)} entities")
+
+
+def run_chunked(chunk_size, compiled=False):
+    from scoring import Scorer, predict_csv
+
+    print("=" * 60)
+    print(f"Scoring test data in chunks of {chunk_size} entities")
+    print("=" * 60)
+
+    n_rows = predict_csv("data/test.csv", "data/test_predictions.csv", chunk_size, Scorer(compiled=compiled))
+    print(f"Scored {n_rows} entities")
+
+
+def run_incremental(compiled=False):
+    from incremental_scoring import rescore
+    from scoring import Scorer
+
+    print("=" * 60)
+    print("Re-scoring changed entities")
+    print("=" * 60)
+
+    summary = rescore(Scorer(compiled=compiled), compiled=compiled)
+    if summary["full"]:
+        print("No matching previous run (or scoring code/models changed): full re-score")
+    print(f"Re-scored {summary['rescored']} of {summary['entities']} entities, "
+          f"dropped {summary['removed']} removed ones in {summary['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subprocess", action="store_true")
+    parser.add_argument("--compiled", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--incremental", action="store_true")
+    args = parser.parse_args()
+
+    if args.subprocess:
+        run_subprocess_chain()
+    elif args.incremental:
+        run_incremental(args.compiled)
+    elif args.chunk_size:
+        run_chunked(args.chunk_size, args.compiled)
+    else:
+        run_in_process(args.compiled)
+
+    print("\n" + "=" * 60)
+    print("COMPLETE! Predictions saved to data/test_predictions.csv")
+    print("=" * 60)
@@ -0,0 +1,72 @@
+"""
+Compact dtypes for the source tables and the pipeline's merged frames.
+
+With PIPELINE_COMPACT=1 the stages pass every source table and checkpoint
+they load through compact(): label and code columns become categoricals,
+ids and integer codes nullable small ints, and float64 columns float32,
+except the targets, which keep float64. Parquet and feather checkpoints
+keep these dtypes between stages. compact() converts in place and prints
+the frame's memory before and after:
+
+    [memory] merged_dataset: 0.77 MB -> 0.17 MB
+
+The default (unset) leaves every frame as loaded, so results stay
+bit-identical to the float64/object pipeline; float32 features change
+model inputs in the last bits. benchmark_schema.py reports both layouts
+for every table.
+"""
+
+import os
+
+import pandas as pd
+
+from instrumentation import add_rows
+
+COMPACT = os.environ.get("PIPELINE_COMPACT") == "1"
+
+CATEGORICAL = [
+    "region_code", "region_name", "country_code", "country_name",
+    "activity_type", "activity_code",
+    "nace_level_1_code", "nace_level_1_name", "nace_level_2_name",
+    "sdg_name",
+]
+INTEGER = {"entity_id": "Int32", "nace_level_2_code": "Int16", "sdg_id": "Int8"}
+FLOAT64 = ["target_scope_1", "target_scope_2"]
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def compact_dtypes(df):
+    """dtype per column of df under the compact schema (only columns that change)."""
+    dtypes = {}
+    for col, dtype in df.dtypes.items():
+        if col in CATEGORICAL and dtype == object:
+            dtypes[col] = "category"
+        elif col in INTEGER and dtype.kind in "iuf":
+            dtypes[col] = INTEGER[col]
+        elif dtype == "float64" and col not in FLOAT64:
+            dtypes[col] = "float32"
+    return dtypes
+
+
+def compact(df, name=None, enabled=None):
+    """Convert df to the compact schema in place (when enabled); returns df."""
+    enabled = COMPACT if enabled is None else enabled
+    if not enabled:
+        return df
+    before = frame_mb(df)
+    for col, dtype in compact_dtypes(df).items():
+        df[col] = df[col].astype(dtype)
+    if name:
+        print(f"[memory] {name}: {before:.2f} MB -> {frame_mb(df):.2f} MB")
+    return df
+
+
+def read_source(path, enabled=None):
+    """pd.read_csv of a source table, compacted when enabled."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    df = pd.read_csv(path)
+    add_rows(read=len(df))
+    return compact(df, name, enabled)
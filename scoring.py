@@ -0,0 +1,98 @@
+"""
+In-process batch scoring.
+
+Loads the scope models, feature_cols and the fitted FeaturePipeline once and
+keeps them resident, so scoring a batch is pure in-memory work:
+
+    from scoring import predict
+    preds = predict(pd.read_csv("data/test.csv"))
+
+The supplementary tables are held as entity-indexed ChildTables
+(entity_join.py), so a batch only merges the child rows of its own entities.
+For universes too large to hold in memory, iter_predictions() reads the
+entity file in chunks and yields one predictions frame per chunk; working
+memory is bounded by the chunk size:
+
+    for preds in iter_predictions("data/test.csv", chunk_size=50_000):
+        ...
+"""
+
+import os
+
+import pandas as pd
+
+from entity_join import ENTITY_KEY, build_child_tables
+from feature_pipeline import PIPELINE_PATH, load_or_fit_pipeline
+from predict_both_scopes import load_models, predict_scopes
+from process_test_data import merge_supplementary
+from schema import read_source
+
+CHUNK_SIZE = 50_000
+
+
+class Scorer:
+    def __init__(self, model_dir="models", pipeline_path=PIPELINE_PATH,
+                 env=None, sdg=None, revenue=None, compiled=False):
+        self.feature_cols, self.best_scope1, self.best_scope2 = load_models(model_dir, compiled)
+        self.pipeline = load_or_fit_pipeline(pipeline_path)
+
+        # Supplementary tables are read once; callers may pass their own
+        self.env = env if env is not None else read_source("data/environmental_activities.csv")
+        self.sdg = sdg if sdg is not None else read_source("data/sustainable_development_goals.csv")
+        self.revenue = revenue if revenue is not None else read_source("data/revenue_distribution_by_sector.csv")
+        self.children = build_child_tables(self.env, self.revenue, self.sdg)
+
+    def features(self, entities):
+        ids = entities[ENTITY_KEY].unique()
+        df = merge_supplementary(
+            entities,
+            self.children["activities"].rows_for(ids),
+            self.children["sdgs"].rows_for(ids),
+            self.children["revenue"].rows_for(ids),
+        )
+        return self.pipeline.transform(df)
+
+    def predict(self, entities):
+        feat = self.features(entities)
+        return predict_scopes(feat, self.feature_cols, self.best_scope1, self.best_scope2)
+
+    def predict_chunks(self, chunks):
+        """Generator: predictions for each entity frame in chunks, one at a time."""
+        for entities in chunks:
+            yield self.predict(entities)
+
+
+_default_scorer = None
+
+
+def get_scorer():
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = Scorer()
+    return _default_scorer
+
+
+def predict(entities_df):
+    return get_scorer().predict(entities_df)
+
+
+def iter_predictions(path="data/test.csv", chunk_size=CHUNK_SIZE, scorer=None):
+    """Score an entity CSV (one row per entity) chunk_size rows at a time."""
+    scorer = scorer or get_scorer()
+    yield from scorer.predict_chunks(pd.read_csv(path, chunksize=chunk_size))
+
+
+def predict_csv(in_path, out_path, chunk_size=CHUNK_SIZE, scorer=None):
+    """Stream predictions for in_path to out_path; returns the number of rows written.
+
+    Output is written to a temporary file and renamed once complete, so a
+    failed run never leaves a truncated predictions file behind.
+    """
+    tmp_path = out_path + ".tmp"
+    n_rows = 0
+    with open(tmp_path, "w", newline="") as f:
+        for preds in iter_predictions(in_path, chunk_size, scorer):
+            preds.to_csv(f, index=False, header=n_rows == 0)
+            n_rows += len(preds)
+    os.replace(tmp_path, out_path)
+    return n_rows
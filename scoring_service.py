@@ -0,0 +1,278 @@
+"""
+Local HTTP scoring service for scope 1 / scope 2 predictions.
+
+Models are loaded once through scoring.Scorer. Concurrent requests are queued
+and coalesced into micro-batches (up to --max-batch-size entities, waiting at
+most --max-wait-ms for the batch to fill) that are scored with one vectorized
+predict call. Records missing a REQUIRED_FIELDS field, or with the wrong type,
+are rejected with 400 before they are queued; if a batch still fails, its
+records are re-scored one at a time so only the failing request errors.
+
+    python scoring_service.py --port 8080 --max-batch-size 64 --max-wait-ms 5
+
+Endpoints:
+    POST /predict   JSON entity (a test.csv row) or a list of them
+    GET  /stats     p50/p99 latency, throughput and batching counters
+    GET  /health
+"""
+
+import argparse
+import asyncio
+import json
+import numbers
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Fields the feature pipeline reads from an entity record
+REQUIRED_FIELDS = {
+    "entity_id": numbers.Integral,
+    "country_code": str,
+    "revenue": numbers.Real,
+    "environmental_score": numbers.Real,
+    "social_score": numbers.Real,
+    "governance_score": numbers.Real,
+}
+
+
+def validate_record(record):
+    if not isinstance(record, dict):
+        raise TypeError(f"entity must be a JSON object, got {type(record).__name__}")
+    for field, kind in REQUIRED_FIELDS.items():
+        if field not in record:
+            raise ValueError(f"missing field {field!r}")
+        value = record[field]
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise TypeError(f"field {field!r} must be {kind.__name__}, got {type(value).__name__}")
+
+
+class LatencyStats:
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        # Completion times of the last `window` requests, for throughput
+        self.finished = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+
+    def record_request(self, seconds):
+        self.requests += 1
+        self.latencies.append(seconds)
+        self.finished.append(time.perf_counter())
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batch_sizes.append(size)
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        # First to last of the recent requests, so idle time doesn't dilute it
+        window_s = self.finished[-1] - self.finished[0] if len(self.finished) > 1 else 0.0
+        lat = np.array(self.latencies) * 1e3 if self.latencies else np.array([np.nan])
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            "p50_ms": float(np.percentile(lat, 50)),
+            "p99_ms": float(np.percentile(lat, 99)),
+            "throughput_rps": (len(self.finished) - 1) / window_s if window_s > 0 else 0.0,
+            "uptime_s": uptime,
+        }
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=5.0, stats=None):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1e3
+        self.stats = stats or LatencyStats()
+        self.queue = asyncio.Queue()
+        # Model calls are CPU bound; a single worker thread keeps the event
+        # loop free to accept requests while a batch is being scored.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.worker = None
+
+    def start(self):
+        self.worker = asyncio.ensure_future(self.run())
+
+    async def submit(self, record):
+        validate_record(record)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    async def collect(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def score(self, records):
+        """Predictions for records, in order.
+
+        The feature pipeline keeps one row per entity_id, so records that
+        repeat an entity_id (concurrent requests with different payloads)
+        go into later scoring calls instead of being merged with the first.
+        """
+        rounds = []
+        for i, record in enumerate(records):
+            for round_ in rounds:
+                if record["entity_id"] not in round_:
+                    round_[record["entity_id"]] = i
+                    break
+            else:
+                rounds.append({record["entity_id"]: i})
+
+        results = [None] * len(records)
+        for round_ in rounds:
+            out = self.score_fn(pd.DataFrame.from_records([records[i] for i in round_.values()]))
+            for row in out.to_dict("records"):
+                results[round_[row["entity_id"]]] = row
+        return results
+
+    def score_each(self, records):
+        """Score records one at a time, so a failure only reaches its own request."""
+        results = []
+        for record in records:
+            try:
+                results.append(self.score([record])[0])
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.collect()
+            records = [record for record, _ in batch]
+            self.stats.record_batch(len(batch))
+            try:
+                results = await loop.run_in_executor(self.executor, self.score, records)
+            except Exception:
+                results = await loop.run_in_executor(self.executor, self.score_each, records)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+async def read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        key, value = header.decode("latin-1").split(":", 1)
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def write_response(writer, status, payload):
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {reasons[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+
+
+class ScoringService:
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.stats = batcher.stats
+
+    async def predict(self, body):
+        payload = json.loads(body)
+        records = payload if isinstance(payload, list) else [payload]
+        # Reject the request before any of its entities is queued
+        for record in records:
+            validate_record(record)
+        results = await asyncio.gather(*(self.batcher.submit(r) for r in records))
+        return results if isinstance(payload, list) else results[0]
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                start = time.perf_counter()
+
+                if method == "POST" and path == "/predict":
+                    try:
+                        status, payload = 200, await self.predict(body)
+                        self.stats.record_request(time.perf_counter() - start)
+                    except (ValueError, KeyError, TypeError) as exc:
+                        self.stats.errors += 1
+                        status, payload = 400, {"error": str(exc)}
+                    except Exception as exc:
+                        self.stats.errors += 1
+                        status, payload = 500, {"error": str(exc)}
+                elif method == "GET" and path == "/stats":
+                    status, payload = 200, self.stats.snapshot()
+                elif method == "GET" and path == "/health":
+                    status, payload = 200, {"status": "ok"}
+                else:
+                    status, payload = 404, {"error": f"no route for {method} {path}"}
+
+                write_response(writer, status, payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, max_batch_size, max_wait_ms):
+    from scoring import Scorer
+
+    scorer = Scorer()
+    batcher = MicroBatcher(scorer.predict, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    batcher.start()
+    service = ScoringService(batcher)
+
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Scoring service listening on http://{host}:{port} "
+          f"(max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Storage layer for the pipeline's intermediate checkpoints.
+
+Checkpoints are addressed by name ("merged_dataset", "merged_dataset_complete",
+...) and stored under data/ in a typed columnar format so dtypes survive
+between stages and readers can load just the columns they need:
+
+    parquet  (default) compressed, column-selective reads, memory-mapped
+    feather  Arrow IPC, uncompressed, zero-copy memory-mapped reads
+    csv      plain text, kept as an export format
+
+The format is chosen with PIPELINE_STORAGE_FORMAT; PIPELINE_EXPORT_CSV=1 also
+writes a CSV copy next to every columnar checkpoint. Readers fall back to an
+existing CSV checkpoint when no columnar file is present, and to CSV storage
+altogether when pyarrow is not installed.
+"""
+
+import os
+import warnings
+
+import pandas as pd
+
+from instrumentation import add_rows
+
+DATA_DIR = "data"
+FORMATS = ("parquet", "feather", "csv")
+EXTENSIONS = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def default_format():
+    fmt = os.environ.get("PIPELINE_STORAGE_FORMAT", "parquet").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format {fmt!r}, expected one of {FORMATS}")
+    if fmt != "csv" and not HAS_PYARROW:
+        warnings.warn("pyarrow is not installed; falling back to CSV checkpoints")
+        return "csv"
+    return fmt
+
+
+def checkpoint_path(name, fmt=None, data_dir=DATA_DIR):
+    return os.path.join(data_dir, name + EXTENSIONS[fmt or default_format()])
+
+
+def resolve_path(name, fmt=None, data_dir=DATA_DIR):
+    """Path of the checkpoint to read: preferred format first, then any other."""
+    preferred = fmt or default_format()
+    for candidate in (preferred,) + tuple(f for f in FORMATS if f != preferred):
+        if candidate != "csv" and not HAS_PYARROW:
+            continue
+        path = checkpoint_path(name, candidate, data_dir)
+        if os.path.exists(path):
+            return path, candidate
+    raise FileNotFoundError(f"No checkpoint named {name!r} in {data_dir}/")
+
+
+def write_table(df, name, fmt=None, data_dir=DATA_DIR, export_csv=None):
+    add_rows(written=len(df))
+    fmt = fmt or default_format()
+    path = checkpoint_path(name, fmt, data_dir)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+
+    if export_csv is None:
+        export_csv = os.environ.get("PIPELINE_EXPORT_CSV") == "1"
+    if export_csv and fmt != "csv":
+        df.to_csv(checkpoint_path(name, "csv", data_dir), index=False)
+    return path
+
+
+def read_table(name, columns=None, fmt=None, data_dir=DATA_DIR):
+    path, fmt = resolve_path(name, fmt, data_dir)
+    if fmt == "parquet":
+        df = pd.read_parquet(path, columns=columns, memory_map=True)
+    elif fmt == "feather":
+        from pyarrow import feather
+        df = feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    add_rows(read=len(df))
+    return df
@@ -0,0 +1,125 @@
+"""
+Synthetic versions of the five source tables at any number of entities.
+
+Every synthetic entity copies a donor entity sampled from the real train
+(or test) table together with all of the donor's rows in the three child
+tables, under a fresh entity_id. Entity-level correlations (country/region,
+sector mix, activities, targets), the 1:many cardinalities and the
+sparsity of the child tables (about half the entities have no activity
+rows, three quarters no SDG rows) therefore follow the real data. Numeric
+columns are jittered so copies are not exact duplicates: revenue and the
+targets by a lognormal factor (zeros stay zero), the scores by a little
+Gaussian noise within the real range, and revenue_pct by a lognormal
+factor renormalised to each entity's real total. Child rows are shuffled,
+as in the real files.
+
+    python synthetic_data.py --entities 100000 --out /tmp/synthetic/data
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+CHILD_TABLES = [
+    "environmental_activities",
+    "revenue_distribution_by_sector",
+    "sustainable_development_goals",
+]
+SCORES = ["overall_score", "environmental_score", "social_score", "governance_score"]
+TARGETS = ["target_scope_1", "target_scope_2"]
+JITTER = 0.1
+
+
+def load_sources(data_dir="data"):
+    names = ["train", "test"] + CHILD_TABLES
+    return {name: pd.read_csv(os.path.join(data_dir, name + ".csv")) for name in names}
+
+
+def lognormal(rng, size):
+    return np.exp(rng.normal(0.0, JITTER, size))
+
+
+def jitter_entities(df, rng):
+    df["revenue"] = (df["revenue"] * lognormal(rng, len(df))).round()
+    for col in SCORES:
+        values = df[col].to_numpy()
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        df[col] = np.clip(values + rng.normal(0.0, JITTER, len(df)), lo, hi).round(3)
+    for col in TARGETS:
+        if col in df.columns:
+            df[col] = (df[col] * lognormal(rng, len(df))).round()
+    return df
+
+
+def copy_rows(child, donor_ids, new_ids):
+    """Rows of child for each donor, relabelled with the matching new id."""
+    child = child.sort_values("entity_id", kind="stable")
+    keys, starts, counts = np.unique(child["entity_id"].to_numpy(), return_index=True, return_counts=True)
+    pos = np.searchsorted(keys, donor_ids)
+    pos = np.minimum(pos, len(keys) - 1)
+    has_rows = keys[pos] == donor_ids
+    n_rows = np.where(has_rows, counts[pos], 0)
+    owner = np.repeat(np.arange(len(donor_ids)), n_rows)
+    # Position of each output row within its donor's block
+    offset = np.arange(len(owner)) - np.repeat(np.cumsum(n_rows) - n_rows, n_rows)
+    rows = child.iloc[np.repeat(starts[pos], n_rows) + offset].reset_index(drop=True)
+    rows["entity_id"] = new_ids[owner]
+    return rows
+
+
+def generate(n_entities, seed=0, sources=None, test_fraction=None):
+    """Dict of table name -> synthetic DataFrame with n_entities train + test entities."""
+    rng = np.random.default_rng(seed)
+    sources = sources or load_sources()
+    train, test = sources["train"], sources["test"]
+    if test_fraction is None:
+        test_fraction = len(test) / (len(train) + len(test))
+    n_test = int(round(n_entities * test_fraction))
+    ids = rng.permutation(np.arange(1, n_entities + 1))
+    train_ids, test_ids = ids[n_test:], ids[:n_test]
+
+    tables = {}
+    donors = {}
+    for name, pool, new_ids in (("train", train, train_ids), ("test", test, test_ids)):
+        picks = rng.integers(0, len(pool), len(new_ids))
+        df = pool.iloc[picks].reset_index(drop=True)
+        donors[name] = df["entity_id"].to_numpy()
+        df["entity_id"] = new_ids
+        tables[name] = jitter_entities(df, rng)
+
+    donor_ids = np.concatenate([donors["train"], donors["test"]])
+    new_ids = np.concatenate([train_ids, test_ids])
+    for name in CHILD_TABLES:
+        rows = copy_rows(sources[name], donor_ids, new_ids)
+        if name == "revenue_distribution_by_sector":
+            pct = rows["revenue_pct"] * lognormal(rng, len(rows))
+            by_entity = rows.groupby("entity_id")["revenue_pct"]
+            rows["revenue_pct"] = (pct / pct.groupby(rows["entity_id"]).transform("sum")
+                                   * by_entity.transform("sum")).round(9)
+        tables[name] = rows.iloc[rng.permutation(len(rows))].reset_index(drop=True)
+    return tables
+
+
+def write_tables(tables, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(os.path.join(out_dir, name + ".csv"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=10_000)
+    parser.add_argument("--out", default="synthetic/data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tables = generate(args.entities, args.seed)
+    write_tables(tables, args.out)
+    for name, df in tables.items():
+        print(f"{name}: {len(df)} rows, {df['entity_id'].nunique()} entities")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split, RandomizedSearchCV
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import ElasticNet
 from xgboost import XGBRegressor
 from catboost import CatBoostRegressor
-from sklearn.decomposition import PCA
+from feature_pipeline import FeaturePipeline, add_model_interactions
+from fold_cache import FoldCache
+from halving_search import halving_search, random_search_curve
+from instrumentation import span
+from compiled_trees import export_models
 import joblib
+from schema import compact
+from storage import read_table, write_table
 import os
 import sys
 import warnings
@@ -18,32 +25,19 @@ os.makedirs("models", exist_ok=True)
 log = open("model_training_log.txt", "w")
 sys.stdout = log
 
-df = pd.read_csv("data/data_after_feature_extraction.csv")
+df = compact(read_table("data_after_feature_extraction"), "data_after_feature_extraction")
 
-df["sector_avg_scope2_log"] = df.groupby("nace_level_2_code")["target_scope_2_log"].transform("mean")
-df["sector_median_scope2_log"] = df.groupby("nace_level_2_code")["target_scope_2_log"].transform("median")
+# Sector/country encodings and the ESG PCA come from the pipeline fitted in
+# feature_engineering.py, so the scoring path applies exactly the same
+# lookup tables and projection
+pipeline = FeaturePipeline.load()
+df = pipeline.add_group_stats(df)
 
-df["country_avg_scope2_log"] = df.groupby("country_code")["target_scope_2_log"].transform("mean")
-country_scope2_mean = df.groupby("country_code")["target_scope_2"].transform("mean")
-country_revenue_mean = df.groupby("country_code")["revenue"].transform("mean")
-df["country_avg_scope2_per_revenue"] = country_scope2_mean / country_revenue_mean
-df["country_avg_esg"] = df.groupby("country_code")["environmental_score"].transform("mean")
+df = add_model_interactions(df)
 
-df["rev_x_env"] = df["revenue"] * df["environmental_score"]
-df["rev_x_gov"] = df["revenue"] * df["governance_score"]
-df["env_x_gov"] = df["environmental_score"] * df["governance_score"]
-df["esg_sum"] = df["environmental_score"] + df["social_score"] + df["governance_score"]
+df["ESG_Comp_1"], df["ESG_Comp_2"] = pipeline.esg_components(df)
 
-if "Sector_Comp_1" in df.columns and "country_ts2_per_revenue" in df.columns:
-    df["sector1_x_country"] = df["Sector_Comp_1"] * df["country_ts2_per_revenue"]
-
-esg_mat = df[["environmental_score", "social_score", "governance_score", "revenue"]].fillna(0)
-pca = PCA(n_components=2, random_state=42)
-esg_pca = pca.fit_transform(esg_mat)
-df["ESG_Comp_1"] = esg_pca[:, 0]
-df["ESG_Comp_2"] = esg_pca[:, 1]
-
-df.to_csv("data/data_after_feature_engineering.csv", index=False)
+write_table(df, "data_after_feature_engineering")
 
 train_val, test = train_test_split(df, test_size=0.15, random_state=42, shuffle=True)
 train, val = train_test_split(train_val, test_size=0.1765, random_state=42, shuffle=True)
@@ -62,15 +56,33 @@ metrics = []
 best_scope1 = None
 best_scope2 = None
 
-for target in targets:
-    X_train = train[feature_cols]
-    y_train = train[target]
-    X_val = val[feature_cols]
-    y_val = val[target]
-    X_test = test[feature_cols]
-    y_test = test[target]
+# --parallel runs every fit on a process pool with explicit thread budgets
+# (see training_scheduler.py) instead of sequential fits with n_jobs=-1
+USE_SCHEDULER = "--parallel" in sys.argv
+scheduler = None
+if USE_SCHEDULER:
+    from training_scheduler import TrainingScheduler
+    threads_per_task = int(os.environ.get("TRAINING_THREADS_PER_TASK", "1"))
+    scheduler = TrainingScheduler(
+        train[feature_cols],
+        {t: train[t] for t in targets},
+        threads_per_task=threads_per_task,
+    )
+
+# --halving replaces the fixed randomized search with successive halving over
+# trees/boosting rounds/rows, with native early stopping for the boosters
+# (see halving_search.py); the search itself runs sequentially
+USE_HALVING = "--halving" in sys.argv
 
-    models = {
+# --joint also fits one CatBoost MultiRMSE model on both log targets and saves
+# it as models/best_joint.joblib, which scoring then prefers over the two
+# single-target models (both scopes come from one pass over the trees)
+USE_JOINT = "--joint" in sys.argv
+JOINT_PATH = "models/best_joint.joblib"
+
+
+def baseline_models():
+    return {
         "RandomForest": RandomForestRegressor(
             n_estimators=300,
             random_state=42,
@@ -95,68 +107,87 @@ for target in targets:
         ),
     }
 
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-
-        val_pred = model.predict(X_val)
-        test_pred = model.predict(X_test)
-
-        val_mae = mean_absolute_error(y_val, val_pred)
-        val_rmse = np.sqrt(mean_squared_error(y_val, val_pred))
-        val_r2 = r2_score(y_val, val_pred)
-
-        test_mae = mean_absolute_error(y_test, test_pred)
-        test_rmse = np.sqrt(mean_squared_error(y_test, test_pred))
-        test_r2 = r2_score(y_test, test_pred)
-
-        metrics.append({
-            "phase": "baseline_phase10",
-            "target": target,
-            "model": name,
-            "val_mae": val_mae,
-            "val_rmse": val_rmse,
-            "val_r2": val_r2,
-            "test_mae": test_mae,
-            "test_rmse": test_rmse,
-            "test_r2": test_r2,
-        })
 
-X_train_tuned = train[feature_cols]
-X_val_tuned = val[feature_cols]
-X_test_tuned = test[feature_cols]
-
-def tune_and_eval(model_name, model, param_dist, target_name, phase_label):
-    y_train_tuned = train[target_name]
-    y_val_tuned = val[target_name]
-    y_test_tuned = test[target_name]
-
-    search = RandomizedSearchCV(
-        model,
-        param_distributions=param_dist,
-        n_iter=20,
-        scoring="neg_mean_squared_error",
-        cv=3,
-        random_state=42,
-        n_jobs=-1,
-        verbose=1,
-    )
-    search.fit(X_train_tuned, y_train_tuned)
-    best = search.best_estimator_
+def evaluate(model_name, model, target_name, phase_label, output=None):
+    y_val = val[target_name]
+    y_test = test[target_name]
 
-    val_pred = best.predict(X_val_tuned)
-    test_pred = best.predict(X_test_tuned)
+    with span("predict", f"{model_name}/{target_name}", rows_in=len(val) + len(test)):
+        val_pred = model.predict(val[feature_cols])
+        test_pred = model.predict(test[feature_cols])
+    if output is not None:
+        # Multi-output model: pick this target's column
+        val_pred = val_pred[:, output]
+        test_pred = test_pred[:, output]
 
     metrics.append({
         "phase": phase_label,
         "target": target_name,
         "model": model_name,
-        "val_mae": mean_absolute_error(y_val_tuned, val_pred),
-        "val_rmse": np.sqrt(mean_squared_error(y_val_tuned, val_pred)),
-        "val_r2": r2_score(y_val_tuned, val_pred),
-        "test_mae": mean_absolute_error(y_test_tuned, test_pred),
-        "test_rmse": np.sqrt(mean_squared_error(y_test_tuned, test_pred)),
-        "test_r2": r2_score(y_test_tuned, test_pred),
+        "val_mae": mean_absolute_error(y_val, val_pred),
+        "val_rmse": np.sqrt(mean_squared_error(y_val, val_pred)),
+        "val_r2": r2_score(y_val, val_pred),
+        "test_mae": mean_absolute_error(y_test, test_pred),
+        "test_rmse": np.sqrt(mean_squared_error(y_test, test_pred)),
+        "test_r2": r2_score(y_test, test_pred),
     })
+
+
+baseline_specs = {
+    (target, name): (model, target)
+    for target in targets
+    for name, model in baseline_models().items()
+}
+if USE_SCHEDULER:
+    baseline_fitted = scheduler.fit_all(baseline_specs)
+else:
+    baseline_fitted = {}
+    for key, (model, target) in baseline_specs.items():
+        with span("fit", f"{key[1]}/{target}", rows_in=len(train)):
+            baseline_fitted[key] = model.fit(train[feature_cols], train[target])
+
+for (target, name), model in baseline_fitted.items():
+    evaluate(name, model, target, "baseline_phase10")
+
+X_train_tuned = train[feature_cols]
+
+# The 3 search folds (unshuffled KFold, as cv=3 splits) and their contiguous
+# matrices, built once and shared by every model, target and search mode
+search_folds = FoldCache("training_search", X_train_tuned, n_splits=3, shuffle=False)
+
+search_curves = []
+
+
+def tune(model_name, model, param_dist, target_name):
+    if USE_HALVING:
+        with span("search", f"{model_name}/{target_name}", rows_in=len(train)):
+            search = halving_search(
+                model, param_dist, X_train_tuned, train[target_name],
+                n_candidates=20, cv=search_folds, random_state=42, **halving_resources[model_name]
+            )
+        curve = search.history
+        best = search.best_estimator_
+    else:
+        # Searched on the cached contiguous matrix; the refit stays on the
+        # DataFrame so the saved model keeps its feature names
+        search = RandomizedSearchCV(
+            model,
+            param_distributions=param_dist,
+            n_iter=20,
+            scoring="neg_mean_squared_error",
+            cv=search_folds.splits,
+            random_state=42,
+            n_jobs=-1,
+            verbose=1,
+            refit=False,
+        )
+        with span("search", f"{model_name}/{target_name}", rows_in=len(train)):
+            search.fit(search_folds.X, train[target_name].to_numpy())
+        curve = random_search_curve(search)
+        with span("fit", f"{model_name}/{target_name}", rows_in=len(train)):
+            best = clone(model).set_params(**search.best_params_).fit(X_train_tuned, train[target_name])
+    for point in curve:
+        search_curves.append({"target": target_name, "model": model_name, **point})
     return best
 
 rf_param_dist = {
@@ -188,44 +219,51 @@ en_param_dist = {
     "max_iter": [5000]
 }
 
-for t, phase_label in [
-    ("target_scope_1_log", "tuned_scope1_phase10"),
-    ("target_scope_2_log", "tuned_scope2_phase10"),
-]:
-    rf_best = tune_and_eval(
-        "RandomForest",
-        RandomForestRegressor(random_state=42),
-        rf_param_dist,
-        t,
-        phase_label,
-    )
-    xgb_best = tune_and_eval(
-        "XGBoost",
-        XGBRegressor(objective="reg:squarederror", random_state=42),
-        xgb_param_dist,
-        t,
-        phase_label,
-    )
-    cat_best = tune_and_eval(
-        "CatBoost",
-        CatBoostRegressor(loss_function="RMSE", random_seed=42, verbose=False),
-        cat_param_dist,
-        t,
-        phase_label,
-    )
-    en_best = tune_and_eval(
-        "ElasticNet",
-        ElasticNet(),
-        en_param_dist,
-        t,
-        phase_label,
-    )
+# Budget each model is halved over; the grid's own values for it are ignored
+halving_resources = {
+    "RandomForest": {"resource": "n_estimators", "max_resource": 800},
+    "XGBoost": {"resource": "n_estimators", "max_resource": 800, "early_stopping_rounds": 50},
+    "CatBoost": {"resource": "iterations", "max_resource": 600, "early_stopping_rounds": 50},
+    # A full ElasticNet fit takes milliseconds and ranks poorly on row subsets
+    "ElasticNet": {"resource": None},
+}
 
-    if t == "target_scope_1_log":
-        best_scope1 = cat_best
-    if t == "target_scope_2_log":
-        best_scope2 = en_best
+phase_labels = {
+    "target_scope_1_log": "tuned_scope1_phase10",
+    "target_scope_2_log": "tuned_scope2_phase10",
+}
 
+search_specs = {}
+for t in phase_labels:
+    search_specs[(t, "RandomForest")] = (RandomForestRegressor(random_state=42), rf_param_dist, t)
+    search_specs[(t, "XGBoost")] = (XGBRegressor(objective="reg:squarederror", random_state=42), xgb_param_dist, t)
+    search_specs[(t, "CatBoost")] = (CatBoostRegressor(loss_function="RMSE", random_seed=42, verbose=False), cat_param_dist, t)
+    search_specs[(t, "ElasticNet")] = (ElasticNet(), en_param_dist, t)
+
+if USE_SCHEDULER and not USE_HALVING:
+    tuned = scheduler.search_all(search_specs, n_iter=20, cv=search_folds, random_state=42)
+else:
+    tuned = {key: tune(key[1], model, dist, t) for key, (model, dist, t) in search_specs.items()}
+if USE_SCHEDULER:
+    scheduler.close()
+
+for (t, name), best in tuned.items():
+    evaluate(name, best, t, phase_labels[t])
+
+best_scope1 = tuned[("target_scope_1_log", "CatBoost")]
+best_scope2 = tuned[("target_scope_2_log", "ElasticNet")]
+
+if USE_JOINT:
+    # Same hyperparameters as the tuned scope 1 CatBoost, one model for both targets
+    joint_params = dict(best_scope1.get_params(), loss_function="MultiRMSE")
+    with span("fit", "CatBoostJoint", rows_in=len(train)):
+        best_joint = CatBoostRegressor(**joint_params).fit(train[feature_cols], train[targets])
+    for i, t in enumerate(targets):
+        evaluate("CatBoostJoint", best_joint, t, phase_labels[t], output=i)
+    joblib.dump(best_joint, JOINT_PATH)
+elif os.path.exists(JOINT_PATH):
+    # A joint model from an earlier run would otherwise shadow the new models
+    os.remove(JOINT_PATH)
 
 metrics_df = pd.DataFrame(metrics)
 metrics_df.to_csv("data/model_metrics.csv", index=False)
@@ -233,6 +271,28 @@ metrics_df.to_csv("data/model_metrics.csv", index=False)
 joblib.dump(best_scope1, "models/best_scope1.joblib")
 joblib.dump(best_scope2, "models/best_scope2.joblib")
 joblib.dump(feature_cols, "models/feature_cols.joblib")
+# Flat-array copies for the compiled inference path (compiled_trees.py)
+export_models()
 
 print("Saved metrics to data/model_metrics.csv")
 print(metrics_df)
+
+curves_df = pd.DataFrame(search_curves, columns=["target", "model", "elapsed_s", "rung", "budget", "score", "best_score"])
+curves_df.to_csv("data/search_curves.csv", index=False)
+if len(curves_df):
+    # Time until each search first reached its final best CV score
+    summary = curves_df.groupby(["target", "model"]).apply(
+        lambda c: pd.Series({
+            "search_s": c["elapsed_s"].max(),
+            "time_to_best_s": c.loc[c["best_score"] >= c["best_score"].max(), "elapsed_s"].min(),
+            "best_cv_mse": -c["best_score"].max(),
+        })
+    )
+    print(f"\nSearch time-to-best ({'halving' if USE_HALVING else 'random'}), curves in data/search_curves.csv:")
+    print(summary)
+
+if USE_SCHEDULER:
+    print("\nScheduler phases "
+          f"({scheduler.n_workers} workers x {scheduler.threads_per_task} threads, "
+          f"{scheduler.n_cores} cores):")
+    print(scheduler.report)
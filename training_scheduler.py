@@ -0,0 +1,168 @@
+"""
+Process-pool scheduler for the model fits in training_model.py.
+
+Every (target, model) fit and every (target, model, candidate, fold) fit of a
+randomized search is an independent task. Tasks run on a process pool of
+n_workers processes, each limited to threads_per_task threads (estimator
+n_jobs/thread_count plus BLAS/OpenMP pools via threadpoolctl), so the cores
+are kept busy without the libraries oversubscribing them.
+
+Candidate sampling and CV splits match RandomizedSearchCV(n_iter, cv,
+random_state=42), so the selected parameters are the same as the sequential
+path.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import KFold, ParameterSampler
+from threadpoolctl import threadpool_limits
+
+from fold_cache import FoldCache
+from instrumentation import span
+
+_X = None
+_targets = None
+
+
+def _init_worker(X, targets):
+    global _X, _targets
+    _X = X
+    _targets = targets
+
+
+def set_thread_budget(estimator, n_threads):
+    params = estimator.get_params()
+    if type(estimator).__name__.startswith("CatBoost"):
+        # Parallel CatBoost fits must not share the catboost_info/ directory
+        estimator.set_params(thread_count=n_threads, allow_writing_files=False)
+    elif "n_jobs" in params:
+        estimator.set_params(n_jobs=n_threads)
+    return estimator
+
+
+def _fit_task(estimator, target, train_idx, val_idx, n_threads):
+    start_cpu = time.process_time()
+    estimator = set_thread_budget(clone(estimator), n_threads)
+    X, y = _X, _targets[target]
+    name = f"{type(estimator).__name__}/{target}"
+    with threadpool_limits(limits=n_threads):
+        if train_idx is None:
+            with span("fit", name, rows_in=len(X)):
+                estimator.fit(X, y)
+            result = estimator
+        else:
+            with span("fit", name, rows_in=len(train_idx)):
+                estimator.fit(X.iloc[train_idx], y.iloc[train_idx])
+            with span("predict", name, rows_in=len(val_idx), rows_out=len(val_idx)):
+                pred = estimator.predict(X.iloc[val_idx])
+            result = -mean_squared_error(y.iloc[val_idx], pred)
+    return result, time.process_time() - start_cpu
+
+
+class PhaseReport:
+    def __init__(self):
+        self.rows = []
+
+    def record(self, phase, wall, cpu, n_tasks, n_cores):
+        self.rows.append({
+            "phase": phase,
+            "tasks": n_tasks,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "utilisation": cpu / (wall * n_cores) if wall > 0 else 0.0,
+        })
+
+    def __str__(self):
+        lines = [f"{'phase':<10} {'tasks':>6} {'wall_s':>8} {'cpu_s':>8} {'util':>6}"]
+        for r in self.rows:
+            lines.append(
+                f"{r['phase']:<10} {r['tasks']:>6} {r['wall_s']:>8.1f} "
+                f"{r['cpu_s']:>8.1f} {r['utilisation']:>6.0%}"
+            )
+        return "\n".join(lines)
+
+
+class TrainingScheduler:
+    def __init__(self, X, targets, n_workers=None, threads_per_task=1):
+        self.n_cores = os.cpu_count() or 1
+        self.threads_per_task = threads_per_task
+        self.n_workers = n_workers or max(1, self.n_cores // threads_per_task)
+        self.report = PhaseReport()
+        # training_model.py is a top-level script, so workers must fork rather
+        # than re-import it under the spawn start method
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(X, targets),
+        )
+        self.n_rows = len(X)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def run_phase(self, phase, tasks):
+        """tasks: {key: (estimator, target, train_idx, val_idx)} -> {key: result}"""
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        futures = {
+            key: self.pool.submit(_fit_task, est, target, tr, va, self.threads_per_task)
+            for key, (est, target, tr, va) in tasks.items()
+        }
+        results, task_cpu = {}, 0.0
+        for key, future in futures.items():
+            results[key], cpu = future.result()
+            task_cpu += cpu
+        wall = time.perf_counter() - start_wall
+        cpu = task_cpu + time.process_time() - start_cpu
+        self.report.record(phase, wall, cpu, len(tasks), self.n_cores)
+        return results
+
+    def fit_all(self, specs, phase="baseline"):
+        """specs: {key: (estimator, target)} -> {key: fitted estimator}"""
+        tasks = {key: (est, target, None, None) for key, (est, target) in specs.items()}
+        return self.run_phase(phase, tasks)
+
+    def search_all(self, specs, n_iter=20, cv=3, random_state=42):
+        """Randomized search over every spec in one pool.
+
+        specs: {key: (estimator, param_dist, target)} -> {key: best refitted estimator}
+        cv: fold count, or a FoldCache whose split indices are reused
+        """
+        if isinstance(cv, FoldCache):
+            folds = cv.splits
+        else:
+            folds = list(KFold(n_splits=cv).split(np.arange(self.n_rows)))
+        candidates = {
+            key: list(ParameterSampler(dist, n_iter=n_iter, random_state=random_state))
+            for key, (_, dist, _) in specs.items()
+        }
+
+        tasks = {}
+        for key, (est, _, target) in specs.items():
+            for c, params in enumerate(candidates[key]):
+                for f, (tr, va) in enumerate(folds):
+                    tasks[(key, c, f)] = (clone(est).set_params(**params), target, tr, va)
+        scores = self.run_phase("search", tasks)
+
+        best_params = {}
+        for key in specs:
+            means = [
+                np.mean([scores[(key, c, f)] for f in range(len(folds))])
+                for c in range(len(candidates[key]))
+            ]
+            best_params[key] = candidates[key][int(np.argmax(means))]
+
+        refit = {
+            key: (clone(est).set_params(**best_params[key]), target)
+            for key, (est, _, target) in specs.items()
+        }
+        return self.fit_all(refit, phase="refit")
@@ -1,10 +1,9 @@
-import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import sys
 from scipy.stats import spearmanr
+import charts
+from plot_renderer import PlotRenderer
 
 class Tee:
     def __init__(self, filename):
@@ -21,9 +20,7 @@ class Tee:
 
 sys.stdout = Tee("trend_n_dist_analysis.txt")
 
-os.makedirs("plots/esg_distributions", exist_ok=True)
-os.makedirs("plots/esg_boxplots", exist_ok=True)
-os.makedirs("plots/env_activities", exist_ok=True)
+plots = PlotRenderer(default=True)
 
 train = pd.read_csv("data/train.csv")
 env_activities = pd.read_csv("data/environmental_activities.csv")
@@ -35,19 +32,8 @@ train["revenue_log"] = np.log1p(train["revenue"])
 for col in numeric_cols + ["revenue_log"]:
     s = train[col].dropna()
 
-    plt.figure(figsize=(6, 4))
-    sns.histplot(s, kde=True)
-    plt.title(f"Distribution of {col}")
-    plt.tight_layout()
-    plt.savefig(f"plots/esg_distributions/{col}_hist.png")
-    plt.close()
-
-    plt.figure(figsize=(4, 4))
-    sns.boxplot(x=s)
-    plt.title(f"Boxplot of {col}")
-    plt.tight_layout()
-    plt.savefig(f"plots/esg_boxplots/{col}_box.png")
-    plt.close()
+    plots.submit(f"plots/esg_distributions/{col}_hist.png", charts.distribution_hist, s, f"Distribution of {col}")
+    plots.submit(f"plots/esg_boxplots/{col}_box.png", charts.distribution_box, s, f"Boxplot of {col}")
 
     q1 = s.quantile(0.25)
     q3 = s.quantile(0.75)
@@ -74,19 +60,10 @@ for activity_type, group in env_activities.groupby("activity_type"):
 
     safe_name = str(activity_type).replace(" ", "_")
 
-    plt.figure(figsize=(6, 4))
-    sns.histplot(s, kde=True)
-    plt.title(f"Env score adjustment distribution: {activity_type}")
-    plt.tight_layout()
-    plt.savefig(f"plots/env_activities/{safe_name}_env_score_hist.png")
-    plt.close()
-
-    plt.figure(figsize=(4, 4))
-    sns.boxplot(x=s)
-    plt.title(f"Env score adjustment boxplot: {activity_type}")
-    plt.tight_layout()
-    plt.savefig(f"plots/env_activities/{safe_name}_env_score_box.png")
-    plt.close()
+    plots.submit(f"plots/env_activities/{safe_name}_env_score_hist.png", charts.distribution_hist, s,
+                 f"Env score adjustment distribution: {activity_type}")
+    plots.submit(f"plots/env_activities/{safe_name}_env_score_box.png", charts.distribution_box, s,
+                 f"Env score adjustment boxplot: {activity_type}")
 
     q1 = s.quantile(0.25)
     q3 = s.quantile(0.75)
@@ -118,30 +95,16 @@ rho, p = spearmanr(ts1.loc[common_index], ts2.loc[common_index])
 print(f"Spearman correlation between target_scope_1 and target_scope_2: {rho:.4f}")
 # As target_scope_1 increases, target_scope_2 tends to increase as well, but not in a linear way. 
 # Because Spearman's rho is higher than Pearson's r, this suggests a monotonic but non-linear relationship.
-plt.figure(figsize=(6, 6))
-sns.scatterplot(x=ts1, y=ts2)
-plt.title("Scatter plot of target_scope_1 vs target_scope_2")
-plt.xlabel("target_scope_1")
-plt.ylabel("target_scope_2")
-plt.tight_layout()
-plt.savefig("plots/target_scope_1_vs_2_scatter.png")
-plt.close()
-print("Scatter plot saved to plots/target_scope_1_vs_2_scatter.png")
+plots.submit("plots/target_scope_1_vs_2_scatter.png", charts.scatter, ts1, ts2,
+             "Scatter plot of target_scope_1 vs target_scope_2", "target_scope_1", "target_scope_2")
 
 # Check correlation between log target_scope_1 and target_scope_2
 ts1_log = np.log1p(ts1)
 common_index = ts1_log.index.intersection(ts2.index)
 correlation_log = ts1_log.loc[common_index].corr(ts2.loc[common_index])
 print(f"\nPearsons correlation between log(target_scope_1) and target_scope_2: {correlation_log:.4f}")
-plt.figure(figsize=(6, 6))
-sns.scatterplot(x=ts1_log, y=ts2)
-plt.title("Scatter plot of log(target_scope_1) vs target_scope_2")
-plt.xlabel("log(target_scope_1)")
-plt.ylabel("target_scope_2")
-plt.tight_layout()
-plt.savefig("plots/log_target_scope_1_vs_2_scatter.png")
-plt.close()
-print("Scatter plot saved to plots/log_target_scope_1_vs_2_scatter.png")
+plots.submit("plots/log_target_scope_1_vs_2_scatter.png", charts.scatter, ts1_log, ts2,
+             "Scatter plot of log(target_scope_1) vs target_scope_2", "log(target_scope_1)", "target_scope_2")
 
 
 # Because of Monotonic relationship between target_scope_1 and target_scope_2,
@@ -149,34 +112,8 @@ print("Scatter plot saved to plots/log_target_scope_1_vs_2_scatter.png")
 x = np.log(ts1.loc[common_index] + 1)
 y = ts2.loc[common_index]
 
-plt.figure(figsize=(8,6))
-sns.regplot(x=x, y=y, lowess=True, scatter_kws={'s':10}, line_kws={'color': 'red'})
-plt.xlabel("log(target_scope_1)")
-plt.ylabel("target_scope_2")
-plt.title("LOWESS Smoothed Trend Between target_scope_1 and target_scope_2")
-plt.tight_layout()
-plt.savefig("plots/log_target_scope_1_vs_2_lowess.png")
-plt.close()
-
-plt.figure(figsize=(8,6))
-plt.hexbin(x, y, gridsize=40, mincnt=1)
-plt.colorbar(label="counts")
-plt.xlabel("log(target_scope_1)")
-plt.ylabel("target_scope_2")
-plt.title("Hexbin Density Plot")
-plt.savefig("plots/log_target_scope_1_vs_2_hexbin.png")
-plt.close()
-
-sns.kdeplot(
-    x=x,
-    y=y,
-    fill=True,
-    levels=30,
-    thresh=0.05
-)
-plt.xlabel("log(target_scope_1)")
-plt.ylabel("target_scope_2")
-plt.title("2D KDE")
-plt.tight_layout()
-plt.savefig("plots/log_target_scope_1_vs_2_kde.png")
-plt.close()
\ No newline at end of file
+plots.submit("plots/log_target_scope_1_vs_2_lowess.png", charts.lowess, x, y)
+plots.submit("plots/log_target_scope_1_vs_2_hexbin.png", charts.hexbin, x, y)
+plots.submit("plots/log_target_scope_1_vs_2_kde.png", charts.kde2d, x, y)
+
+plots.render()